@@ -18,7 +18,6 @@ client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 pygame.mixer.init()
 
 # File path sementara
-TEMP_INPUT_FILE = "temp_input.wav"
 TEMP_OUTPUT_FILE = "temp_output.mp3"
 
 def listen():
@@ -39,18 +38,16 @@ def listen():
             
             print(f"{Fore.YELLOW}[PROCESS] Mengirim audio ke Groq Whisper...{Style.RESET_ALL}")
             
-            # Simpan file sementara
-            with open(TEMP_INPUT_FILE, "wb") as f:
-                f.write(audio.get_wav_data())
+            # Ambil WAV langsung di memory (tanpa file sementara)
+            wav_bytes = audio.get_wav_data()
 
             # --- BAGIAN YG DIUPDATE: Pake model whisper-large-v3 ---
-            with open(TEMP_INPUT_FILE, "rb") as file_obj:
-                transcription = client.audio.transcriptions.create(
-                    file=(TEMP_INPUT_FILE, file_obj.read()),
-                    model="whisper-large-v3",  # <-- Model baru yang stabil
-                    response_format="text",
-                    language="en" # Opsional: paksa inggris biar lebih akurat
-                )
+            transcription = client.audio.transcriptions.create(
+                file=("input.wav", wav_bytes),
+                model="whisper-large-v3",  # <-- Model baru yang stabil
+                response_format="text",
+                language="en" # Opsional: paksa inggris biar lebih akurat
+            )
             # -------------------------------------------------------
             
             text_result = transcription.strip()
@@ -107,7 +104,6 @@ async def main():
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}Program dihentikan.{Style.RESET_ALL}")
         # Bersihkan file sampah
-        if os.path.exists(TEMP_INPUT_FILE): os.remove(TEMP_INPUT_FILE)
         if os.path.exists(TEMP_OUTPUT_FILE): os.remove(TEMP_OUTPUT_FILE)
 
 if __name__ == "__main__":
@@ -12,7 +12,7 @@ from colorama import init, Fore, Style
 
 # --- LIBRARY KHUSUS INTERUPSI ---
 import pyaudio
-import audioop
+import numpy as np  # pengganti audioop (dihapus di Python 3.13)
 
 # --- 1. SETUP & CONFIGURATION ---
 init()
@@ -22,7 +22,6 @@ client_whisper = Groq(api_key=os.getenv("GROQ_API_KEY"))
 client_chat = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
 
 pygame.mixer.init()
-TEMP_INPUT_FILE = "temp_input.wav"
 TEMP_OUTPUT_FILE = "temp_output.mp3"
 WAKE_WORD = "kevin"
 
@@ -100,19 +99,17 @@ def listen():
         try:
             audio = recognizer.listen(source, timeout=5, phrase_time_limit=8)
             
-            with open(TEMP_INPUT_FILE, "wb") as f:
-                f.write(audio.get_wav_data())
+            wav_bytes = audio.get_wav_data()
 
             KEYWORDS_PROMPT = "Kevin, Notepad, Chrome, Spotify, Calculator, Shutdown, Restart, Open, Close"
 
-            with open(TEMP_INPUT_FILE, "rb") as file_obj:
-                transcription = client_whisper.audio.transcriptions.create(
-                    file=(TEMP_INPUT_FILE, file_obj.read()),
-                    model="whisper-large-v3",
-                    prompt=KEYWORDS_PROMPT, 
-                    response_format="text",
-                    task="translate" # Tetap translate ke English
-                )
+            transcription = client_whisper.audio.transcriptions.create(
+                file=("input.wav", wav_bytes),
+                model="whisper-large-v3",
+                prompt=KEYWORDS_PROMPT, 
+                response_format="text",
+                task="translate" # Tetap translate ke English
+            )
             
             text_result = transcription.strip()
             if text_result:
@@ -176,7 +173,8 @@ async def speak(text):
                     # Baca data suara dari mic
                     data = stream.read(chunk, exception_on_overflow=False)
                     # Hitung volume (RMS)
-                    rms = audioop.rms(data, 2) 
+                    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+                    rms = int(np.sqrt(np.mean(samples * samples))) 
                     
                     # LOGIC POTONG OMONGAN
                     if rms > INTERRUPT_THRESHOLD: 
@@ -241,7 +239,6 @@ async def main():
 
     except KeyboardInterrupt:
         print("\n[SYSTEM] Force Shutdown.")
-        if os.path.exists(TEMP_INPUT_FILE): os.remove(TEMP_INPUT_FILE)
         if os.path.exists(TEMP_OUTPUT_FILE): os.remove(TEMP_OUTPUT_FILE)
 
 if __name__ == "__main__":
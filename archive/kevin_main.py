@@ -19,7 +19,6 @@ client_chat = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
 
 # Setup Audio
 pygame.mixer.init()
-TEMP_INPUT_FILE = "temp_input.wav"
 TEMP_OUTPUT_FILE = "temp_output.mp3"
 
 # --- PERSONA KEVIN (MODE JARVIS) ---
@@ -60,16 +59,14 @@ def listen():
             audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
             print(f"{Fore.YELLOW}[WHISPER] Processing audio...{Style.RESET_ALL}")
             
-            with open(TEMP_INPUT_FILE, "wb") as f:
-                f.write(audio.get_wav_data())
-
-            with open(TEMP_INPUT_FILE, "rb") as file_obj:
-                transcription = client_whisper.audio.transcriptions.create(
-                    file=(TEMP_INPUT_FILE, file_obj.read()),
-                    model="whisper-large-v3",
-                    response_format="text",
-                    language="en"
-                )
+            wav_bytes = audio.get_wav_data()
+
+            transcription = client_whisper.audio.transcriptions.create(
+                file=("input.wav", wav_bytes),
+                model="whisper-large-v3",
+                response_format="text",
+                language="en"
+            )
             
             text_result = transcription.strip()
             print(f"{Fore.GREEN}[YOU] {text_result}{Style.RESET_ALL}")
@@ -162,7 +159,6 @@ async def main():
 
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}Force shutdown initiated.{Style.RESET_ALL}")
-        if os.path.exists(TEMP_INPUT_FILE): os.remove(TEMP_INPUT_FILE)
         if os.path.exists(TEMP_OUTPUT_FILE): os.remove(TEMP_OUTPUT_FILE)
 
 if __name__ == "__main__":
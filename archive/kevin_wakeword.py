@@ -18,7 +18,6 @@ client_chat = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
 
 # Audio Setup
 pygame.mixer.init()
-TEMP_INPUT_FILE = "temp_input.wav"
 TEMP_OUTPUT_FILE = "temp_output.mp3"
 WAKE_WORD = "kevin"  # <-- Kata kunci pemicu
 
@@ -46,18 +45,16 @@ def listen():
             # Timeout diperpanjang dikit biar gak gampang putus
             audio = recognizer.listen(source, timeout=None, phrase_time_limit=8)
             
-            # Simpan file audio
-            with open(TEMP_INPUT_FILE, "wb") as f:
-                f.write(audio.get_wav_data())
+            # Ambil WAV langsung di memory (tanpa file sementara)
+            wav_bytes = audio.get_wav_data()
 
             # Transkrip Whisper
-            with open(TEMP_INPUT_FILE, "rb") as file_obj:
-                transcription = client_whisper.audio.transcriptions.create(
-                    file=(TEMP_INPUT_FILE, file_obj.read()),
-                    model="whisper-large-v3",
-                    response_format="text",
-                    language="en"
-                )
+            transcription = client_whisper.audio.transcriptions.create(
+                file=("input.wav", wav_bytes),
+                model="whisper-large-v3",
+                response_format="text",
+                language="en"
+            )
             
             text_result = transcription.strip()
             # Tampilkan apa yang didengar (warna abu-abu dulu karena belum tentu diproses)
@@ -165,7 +162,6 @@ async def main():
 
     except KeyboardInterrupt:
         print("\nForce Shutdown.")
-        if os.path.exists(TEMP_INPUT_FILE): os.remove(TEMP_INPUT_FILE)
         if os.path.exists(TEMP_OUTPUT_FILE): os.remove(TEMP_OUTPUT_FILE)
 
 if __name__ == "__main__":
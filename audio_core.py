@@ -0,0 +1,317 @@
+import threading
+import time
+import struct
+import numpy as np
+import pyaudio
+from colorama import Fore, Style
+
+# --- AUDIO CONFIG ---
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+RING_SECONDS = 30          # Kapasitas ring buffer (history mic)
+PREROLL_SECONDS = 0.4      # Audio sebelum onset yang ikut dikirim (anti suku kata terpotong)
+ECHO_COUPLING = 0.5        # Echo speaker di mic dianggap maksimal 0.5x level output; suara user harus di atas itu
+PLAYBACK_RATIO = 2.0       # Threshold VAD barge-in dinaikkan 2x selama speaker bunyi
+
+
+class RingBuffer:
+    """
+    Fixed-size int16 ring buffer. Posisi pakai index sample absolut
+    (total sample yang pernah ditulis), jadi reader bisa pegang cursor sendiri.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._cond = threading.Condition()
+        self.write_pos = 0
+
+    @property
+    def oldest_pos(self):
+        return max(0, self.write_pos - self.capacity)
+
+    def write(self, samples):
+        n = len(samples)
+        skipped = max(0, n - self.capacity)
+        if skipped:
+            samples = samples[skipped:]
+            n = self.capacity
+        with self._cond:
+            start = (self.write_pos + skipped) % self.capacity
+            first = min(n, self.capacity - start)
+            self._buf[start:start + first] = samples[:first]
+            if first < n:
+                self._buf[:n - first] = samples[first:]
+            self.write_pos += skipped + n
+            self._cond.notify_all()
+
+    def read(self, start, end):
+        """Copy sample [start, end) ke array baru. Start di-clamp ke data tertua."""
+        with self._cond:
+            start = max(start, self.oldest_pos)
+            end = min(end, self.write_pos)
+            if end <= start:
+                return np.zeros(0, dtype=np.int16)
+            s, e = start % self.capacity, end % self.capacity
+            if s < e:
+                return self._buf[s:e].copy()
+            return np.concatenate((self._buf[s:], self._buf[:e]))
+
+    def wait_for(self, pos, timeout):
+        """Block sampai write_pos >= pos. Return False kalau timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.write_pos >= pos, timeout=timeout)
+
+
+def frame_rms(samples):
+    """RMS per frame (vectorized). Sisa sample yang tidak genap 1 frame dibuang."""
+    n_frames = len(samples) // FRAME_SAMPLES
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n_frames * FRAME_SAMPLES].reshape(n_frames, FRAME_SAMPLES).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+class VoiceActivityDetector:
+    """
+    Frame-energy VAD dengan threshold adaptif: threshold = noise_floor * ratio.
+    Noise floor di-update (EMA) hanya dari frame yang dianggap non-speech.
+    """
+    def __init__(self, ratio=3.0, min_threshold=150.0, floor_alpha=0.05):
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.floor_alpha = floor_alpha
+        self.noise_floor = min_threshold / ratio
+
+    @property
+    def threshold(self):
+        return max(self.min_threshold, self.noise_floor * self.ratio)
+
+    def calibrate(self, samples):
+        rms = frame_rms(samples)
+        if len(rms):
+            self.noise_floor = float(np.median(rms))
+        return self.threshold
+
+    def classify(self, samples):
+        """Return (is_speech bool array per frame, rms array). Update noise floor sekalian."""
+        rms = frame_rms(samples)
+        is_speech = rms > self.threshold
+        quiet = rms[~is_speech]
+        if len(quiet):
+            # EMA sebanyak k langkah sekaligus, pakai rata-rata frame hening
+            decay = (1.0 - self.floor_alpha) ** len(quiet)
+            self.noise_floor = decay * self.noise_floor + (1.0 - decay) * float(np.mean(quiet))
+        return is_speech, rms
+
+
+def encode_wav(samples, rate=SAMPLE_RATE):
+    """Bungkus PCM int16 mono jadi WAV bytes (satu kali copy, tanpa file)."""
+    data_len = len(samples) * 2
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_len, b"WAVE", b"fmt ", 16, 1, 1,
+        rate, rate * 2, 2, 16, b"data", data_len,
+    )
+    return b"".join((header, memoryview(samples)))
+
+
+class MicStream:
+    """
+    Satu stream mic yang hidup terus selama agent jalan.
+    Callback PyAudio nulis ke RingBuffer; capture & barge-in cuma baca buffer.
+    """
+    def __init__(self, rate=SAMPLE_RATE, ring_seconds=RING_SECONDS, preroll_seconds=PREROLL_SECONDS):
+        self.rate = rate
+        self.ring = RingBuffer(rate * ring_seconds)
+        self.preroll_samples = int(rate * preroll_seconds)
+        self.vad = VoiceActivityDetector()
+        self.last_voiced_pos = None   # Akhir frame speech terakhir dari utterance yang sedang di-capture
+        self._pa = None
+        self._stream = None
+
+    @property
+    def position(self):
+        return self.ring.write_pos
+
+    def trailing_silence(self):
+        """Detik sejak frame speech terakhir utterance yang sedang di-capture (None kalau belum ada)."""
+        if self.last_voiced_pos is None:
+            return None
+        return (self.position - self.last_voiced_pos) / self.rate
+
+    def start(self):
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+            frames_per_buffer=FRAME_SAMPLES, stream_callback=self._on_audio,
+        )
+        self._stream.start_stream()
+        print(f"{Fore.YELLOW}[SYSTEM] Mic stream opened ({self.rate} Hz, pre-roll {self.preroll_samples / self.rate:.1f}s).{Style.RESET_ALL}")
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, pyaudio.paContinue)
+
+    def close(self):
+        try:
+            if self._stream:
+                self._stream.stop_stream()
+                self._stream.close()
+            if self._pa:
+                self._pa.terminate()
+        except Exception:
+            pass
+        self._stream = None
+        self._pa = None
+
+    def calibrate(self, duration=1.0):
+        """Ukur noise ambient dari stream yang sudah jalan (pengganti adjust_for_ambient_noise)."""
+        start = self.position
+        self.ring.wait_for(start + int(self.rate * duration), timeout=duration + 1.0)
+        return self.vad.calibrate(self.ring.read(start, self.position))
+
+    def capture_utterance(self, timeout, phrase_limit, pause_threshold=0.8, min_speech=0.25, start_pos=None, on_onset=None):
+        """
+        Segmentasi 1 utterance dari ring buffer (blocking, panggil dari executor).
+        Return int16 array (termasuk pre-roll) atau None kalau tidak ada suara sampai timeout.
+        on_onset(pos) dipanggil (dari thread ini) begitu onset speech pertama terdeteksi.
+        """
+        cursor = self.position if start_pos is None else max(start_pos, self.ring.oldest_pos)
+        deadline = time.monotonic() + timeout
+        pause_frames = int(pause_threshold * 1000 / FRAME_MS)
+        min_frames = max(1, int(min_speech * 1000 / FRAME_MS))
+        max_samples = int(phrase_limit * self.rate)
+
+        onset = None
+        voiced = silent = 0
+        self.last_voiced_pos = None
+        while True:
+            if not self.ring.wait_for(cursor + FRAME_SAMPLES, timeout=0.1):
+                if onset is None and time.monotonic() > deadline:
+                    return None
+                continue
+            # Reader ketinggalan lebih dari kapasitas ring: loncat ke data tertua
+            cursor = max(cursor, self.ring.oldest_pos)
+            # Proses semua frame yang sudah tersedia sekaligus
+            available = (self.position - cursor) // FRAME_SAMPLES * FRAME_SAMPLES
+            speech_flags, _ = self.vad.classify(self.ring.read(cursor, cursor + available))
+            for is_speech in speech_flags:
+                if onset is None:
+                    if is_speech:
+                        onset, voiced, silent = cursor, 1, 0
+                        self.last_voiced_pos = cursor + FRAME_SAMPLES
+                        if on_onset:
+                            on_onset(onset)
+                else:
+                    if is_speech:
+                        voiced += 1
+                        silent = 0
+                        self.last_voiced_pos = cursor + FRAME_SAMPLES
+                    else:
+                        silent += 1
+                cursor += FRAME_SAMPLES
+                if onset is None:
+                    continue
+                if silent >= pause_frames or cursor - onset >= max_samples:
+                    if voiced < min_frames:
+                        # Cuma klik / noise pendek, reset dan tunggu lagi
+                        onset = self.last_voiced_pos = None
+                        continue
+                    return self.ring.read(onset - self.preroll_samples, cursor)
+            if onset is None and time.monotonic() > deadline:
+                return None
+
+
+class BargeInMonitor:
+    """
+    Thread kecil yang memantau ring buffer selama Kevin bicara.
+    Begitu ada speech lokal (onset_frames frame berturut-turut), on_trigger dipanggil
+    langsung dari thread ini (mis. flush speaker) tanpa menunggu event loop.
+    Echo guard: selama output bunyi (output_level() > 0), frame baru dihitung speech kalau
+    di atas threshold yang dinaikkan DAN di atas perkiraan echo dari level output.
+    """
+    def __init__(self, mic, on_trigger, ratio=4.0, onset_frames=2, output_level=None):
+        self.mic = mic
+        self.on_trigger = on_trigger
+        self.output_level = output_level or (lambda: 0.0)
+        self.vad = VoiceActivityDetector(ratio=ratio)
+        self.onset_frames = onset_frames
+        self.triggered_pos = None
+        self._resume_pos = None
+        self._cursor = 0
+        self._generation = 0
+        self._armed = threading.Event()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True, name="barge-in").start()
+
+    @property
+    def triggered(self):
+        return self.triggered_pos is not None
+
+    def arm(self):
+        with self._lock:
+            self._cursor = self.mic.position
+            self._generation += 1
+            self.vad.noise_floor = self.mic.vad.noise_floor
+            self._armed.set()
+
+    def disarm(self):
+        self._armed.clear()
+
+    def reset(self):
+        """
+        Awal speak baru: trigger lama tidak boleh men-skip ucapan ini. Posisi onset-nya
+        tetap disimpan untuk capture berikutnya (consume).
+        """
+        with self._lock:
+            if self.triggered_pos is not None:
+                self._resume_pos, self.triggered_pos = self.triggered_pos, None
+
+    def consume(self):
+        """Ambil posisi onset barge-in (untuk capture berikutnya) lalu reset."""
+        with self._lock:
+            pos = self.triggered_pos if self.triggered_pos is not None else self._resume_pos
+            self.triggered_pos = self._resume_pos = None
+            return pos
+
+    def _echo_guard(self, speech_flags, rms):
+        level = self.output_level()
+        if level <= 0:
+            return speech_flags
+        floor = max(self.vad.threshold * PLAYBACK_RATIO, level * ECHO_COUPLING)
+        return speech_flags & (rms > floor)
+
+    def _run(self):
+        run_length = 0
+        seen_generation = 0
+        while True:
+            self._armed.wait()
+            with self._lock:
+                cursor, generation = max(self._cursor, self.mic.ring.oldest_pos), self._generation
+            if generation != seen_generation:
+                run_length, seen_generation = 0, generation
+            if not self.mic.ring.wait_for(cursor + FRAME_SAMPLES, timeout=0.05):
+                continue
+            available = (self.mic.position - cursor) // FRAME_SAMPLES * FRAME_SAMPLES
+            speech_flags, rms = self.vad.classify(self.mic.ring.read(cursor, cursor + available))
+            speech_flags = self._echo_guard(speech_flags, rms)
+
+            fired = False
+            with self._lock:
+                if not self._armed.is_set() or generation != self._generation:
+                    continue  # Di-disarm / di-arm ulang selagi proses, buang hasil lama
+                for is_speech in speech_flags:
+                    run_length = run_length + 1 if is_speech else 0
+                    cursor += FRAME_SAMPLES
+                    if run_length >= self.onset_frames:
+                        self.triggered_pos = cursor - run_length * FRAME_SAMPLES
+                        self._armed.clear()
+                        fired = True
+                        break
+                self._cursor = cursor
+            if fired:
+                try:
+                    self.on_trigger()
+                except Exception:
+                    pass
@@ -0,0 +1,212 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+import numpy as np
+from colorama import Fore, Style, init
+
+import memory_core
+from memory_backend import open_backend
+
+init(autoreset=True)
+
+SIZES = [1000, 10000, 100000]
+TYPE_MIX = {"conversation": 0.6, "fact": 0.3, "preference": 0.1}
+FILL_BATCH = 1000
+EMBED_DIM = 384   # Sama dengan all-MiniLM-L6-v2
+
+SUBJECTS = ["aku", "kakak aku", "temen kantor", "dosen aku", "tim aku", "my sister", "my boss"]
+TOPICS = ["musik jazz", "kopi susu", "python", "deadline proyek", "spotify", "chrome", "badminton",
+          "film horor", "resep nasi goreng", "kucing", "ujian besok", "game strategi", "laptop baru"]
+TEMPLATES = {
+    "fact": ["{s} kerja di bagian {t} sejak {n} tahun", "{s} ulang tahun tanggal {n}", "{s} punya {n} {t}"],
+    "preference": ["{s} lebih suka {t} daripada yang lain", "{s} prefer {t} buat kerja", "tolong selalu pakai {t} ya"],
+    "conversation": ["tadi {s} ngobrol soal {t} sekitar {n} menit", "menurut kamu {t} itu gimana", "{s} lagi bosen sama {t}"],
+}
+
+
+class HashEmbedder:
+    """Embedding acak deterministik per teks: untuk mengukur store tanpa biaya model."""
+    def encode(self, texts, normalize_embeddings=True):
+        out = np.empty((len(texts), EMBED_DIM), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+            out[i] = np.random.default_rng(seed).standard_normal(EMBED_DIM)
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+def synthetic_memories(count, seed=0):
+    rng = random.Random(seed)
+    types, weights = zip(*TYPE_MIX.items())
+    now = time.time()
+    for i in range(count):
+        memory_type = rng.choices(types, weights)[0]
+        text = rng.choice(TEMPLATES[memory_type]).format(s=rng.choice(SUBJECTS), t=rng.choice(TOPICS), n=rng.randint(1, 99))
+        user_input = f"{text} #{i}"
+        yield memory_type, user_input, f"User: {user_input} | Kevin: Noted."
+
+
+def percentiles(samples_ms):
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(np.mean(samples_ms)), 3), "n": len(samples_ms)}
+
+
+def rss_mb():
+    """RSS saat ini (psutil, atau /proc/self/statm di Linux). None kalau tidak bisa dibaca."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak RSS proses (ru_maxrss: KB di Linux, byte di macOS)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if platform.system() == "Darwin" else peak / 1e3
+
+
+def fill(manager, count):
+    """Isi store langsung per batch besar (bukan bagian yang diukur)."""
+    t_start = time.perf_counter()
+    batch = []
+    for memory_type, user_input, document in synthetic_memories(count):
+        now = time.time()
+        batch.append({"document": document, "id": memory_core.memory_id(memory_type, user_input),
+                      "metadata": {"type": memory_type, "timestamp": now, "last_recalled": now, "raw_input": user_input}})
+        if len(batch) >= FILL_BATCH:
+            manager._store_batch(batch)
+            batch = []
+    if batch:
+        manager._store_batch(batch)
+    return time.perf_counter() - t_start
+
+
+def bench_inserts(manager, n):
+    memories = list(synthetic_memories(n, seed=1))
+    # add_memory: enqueue (yang dibayar turn) + flush (yang dibayar writer thread)
+    t_start = time.perf_counter()
+    for memory_type, user_input, _ in memories:
+        manager.add_memory(user_input, "Noted.", memory_type)
+    enqueue_s = time.perf_counter() - t_start
+    t_flush = time.perf_counter()
+    manager.flush()
+    flush_s = time.perf_counter() - t_flush
+
+    def record(memory_type, user_input, document):
+        now = time.time()
+        return {"document": document, "id": memory_core.memory_id(memory_type, f"{user_input} x"),
+                "metadata": {"type": memory_type, "timestamp": now, "last_recalled": now, "raw_input": user_input}}
+
+    single_ms = []
+    for memory_type, user_input, document in memories[:min(n, 50)]:
+        t0 = time.perf_counter()
+        manager._store_batch([record(memory_type, user_input, document)])
+        single_ms.append((time.perf_counter() - t0) * 1000)
+    batch = [record(t, f"{u} batch", d) for t, u, d in memories]
+    t0 = time.perf_counter()
+    manager._store_batch(batch)
+    batched_ms = (time.perf_counter() - t0) * 1000
+    return {
+        "add_memory_enqueue_per_s": round(n / enqueue_s, 1),
+        "add_memory_end_to_end_per_s": round(n / (enqueue_s + flush_s), 1),
+        "insert_single": percentiles(single_ms),
+        "insert_batched_ms_per_item": round(batched_ms / len(batch), 3),
+        "batch_size": len(batch),
+    }
+
+
+def bench_recall(manager, n_queries):
+    filters = {"none": None, "preference": "preference", "in_fact_preference": ["fact", "preference"]}
+    queries = [f"{user_input} ?" for _, user_input, _ in synthetic_memories(n_queries, seed=2)]
+    results = {}
+    for name, memory_filter in filters.items():
+        samples = []
+        for i, query in enumerate(queries):
+            # Query unik per filter -> tidak kena cache hasil/embedding
+            t0 = time.perf_counter()
+            manager.retrieve_memory(f"{query} {name} {i}", n_results=2, memory_type_filter=memory_filter)
+            samples.append((time.perf_counter() - t0) * 1000)
+        results[name] = percentiles(samples)
+    return results
+
+
+def run(backend, size, args, embedder):
+    path = tempfile.mkdtemp(prefix=f"kevin_bench_{backend}_")
+    print(f"{Fore.CYAN}[BENCH] {backend} / {size} memories ({path}){Style.RESET_ALL}")
+    try:
+        manager = memory_core.MemoryManager(path=path, backend=backend, embedder=embedder)
+        fill_s = fill(manager, size)
+        result = {"backend": backend, "size": size, "fill_s": round(fill_s, 3)}
+        result["inserts"] = bench_inserts(manager, args.inserts)
+        result["recall"] = bench_recall(manager, args.queries)
+        manager.close()
+
+        t0 = time.perf_counter()
+        store = open_backend(backend, path)
+        count = store.count()
+        result["cold_open_store_s"] = round(time.perf_counter() - t0, 4)
+        store.close()
+        t0 = time.perf_counter()
+        manager = memory_core.MemoryManager(path=path, backend=backend, embedder=embedder)
+        manager.retrieve_memory("cold start query", n_results=2)
+        result["cold_open_first_recall_s"] = round(time.perf_counter() - t0, 4)
+        manager.close()
+        result["count"] = count
+        result["rss_mb"] = rss_mb()
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MemoryManager (insert, recall, cold open, RSS).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"], choices=["chroma", "numpy"])
+    parser.add_argument("--embedder", default="model", choices=["model", "hash"],
+                        help="model = SentenceTransformer asli, hash = vektor acak (ukur store saja)")
+    parser.add_argument("--inserts", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--out", default="bench_memory.json")
+    args = parser.parse_args()
+
+    embedder = HashEmbedder() if args.embedder == "hash" else memory_core.load_embedder()
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "embedder": args.embedder, "type_mix": TYPE_MIX, "inserts": args.inserts, "queries": args.queries,
+        },
+        "results": [],
+    }
+    for backend in args.backends:
+        for size in args.sizes:
+            try:
+                report["results"].append(run(backend, size, args, embedder))
+            except Exception as e:
+                print(f"{Fore.RED}[BENCH ERROR] {backend}/{size}: {e}{Style.RESET_ALL}")
+                report["results"].append({"backend": backend, "size": size, "error": str(e)})
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    for row in report["results"]:
+        if "error" in row: continue
+        recall = row["recall"]["in_fact_preference"]
+        print(f"{Fore.GREEN}[BENCH] {row['backend']:>6} {row['size']:>7}: recall p50 {recall['p50_ms']}ms "
+              f"p99 {recall['p99_ms']}ms | cold open {row['cold_open_store_s']}s | RSS {row['rss_mb']} MB{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}[BENCH] Saved to {args.out}{Style.RESET_ALL}")
@@ -0,0 +1,563 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+import types
+import wave
+import numpy as np
+from aiohttp import web, WSMsgType
+from colorama import Fore, Style, init
+
+
+def install_pyaudio_placeholder():
+    """PyAudio tidak terpasang: audio_core/tts_core tetap bisa di-import (replay pakai device file)."""
+    try:
+        import pyaudio  # noqa: F401
+    except ImportError:
+        pa = types.ModuleType("pyaudio")
+        pa.paInt16, pa.paContinue = 8, 0
+        def _no_device(*args, **kwargs):
+            raise RuntimeError("PyAudio tidak terpasang (replay pakai device file)")
+        pa.PyAudio = _no_device
+        sys.modules["pyaudio"] = pa
+
+
+install_pyaudio_placeholder()
+from audio_core import SAMPLE_RATE, FRAME_MS, FRAME_SAMPLES  # noqa: E402
+
+init(autoreset=True)
+
+TURNS_DIR = "replay_turns"
+TURNS_FILE = "turns.jsonl"
+WORKDIR = "bench_replay_run"   # cwd agent selama replay (tts cache, memory, traces, speaker.wav)
+TURN_TIMEOUT = 30.0
+MIC_NOISE_RMS = 40.0           # Noise ruangan di antara utterance (di bawah threshold VAD)
+SPEECH_SECONDS_PER_CHAR = 0.065
+# Satu frame MPEG-2 Layer III hening: 24 kHz mono 48 kbps (format edge-tts), 576 sample / 144 byte
+SILENT_MP3_FRAME = b"\xff\xf3\x64\xc0" + bytes(140)
+MP3_FRAME_SECONDS = 576 / 24000
+TTS_FRAMES_PER_MESSAGE = 8
+LLM_CHARS_PER_TOKEN = 4
+DEFAULT_REPLY = {"reply": "Understood.", "action": "none", "target": "", "confidence": 0.9,
+                 "requires_confirmation": False, "memory_type": "skip"}
+
+# Corpus sintetis (tanpa rekaman): transkrip + jawaban LLM kalengan per turn
+SYNTH_TURNS = [
+    {"transcript": "buka spotify", "reply": {"reply": "Opening Spotify.", "action": "open", "target": "spotify", "confidence": 0.95, "requires_confirmation": False, "memory_type": "skip"}},
+    {"transcript": "what's the weather like for a walk today", "reply": {"reply": "I can't see outside, sir. But a light jacket never hurt anyone. Shall I open the forecast?", "action": "none", "target": "", "confidence": 0.9, "requires_confirmation": False, "memory_type": "conversation"}},
+    {"transcript": "putar lagu lofi", "reply": {"reply": "Playing lofi.", "action": "media", "target": "lofi", "confidence": 0.9, "requires_confirmation": False, "memory_type": "preference"}},
+    {"transcript": "tell me something interesting about octopuses", "reply": {"reply": "Octopuses have three hearts and blue blood. Two hearts stop when they swim, which is why they prefer crawling.", "action": "none", "target": "", "confidence": 0.9, "requires_confirmation": False, "memory_type": "fact"}},
+    {"transcript": "tutup notepad", "reply": {"reply": "Closing Notepad.", "action": "close", "target": "notepad", "confidence": 0.95, "requires_confirmation": False, "memory_type": "skip"}},
+    {"transcript": "how should I structure my afternoon", "reply": {"reply": "Deep work first, while your coffee is still effective. Meetings after three. Email last, as penance.", "action": "none", "target": "", "confidence": 0.85, "requires_confirmation": False, "memory_type": "conversation"}},
+    {"transcript": "cari tutorial python asyncio", "reply": {"reply": "Searching now.", "action": "type", "target": "python asyncio tutorial", "confidence": 0.9, "requires_confirmation": False, "memory_type": "skip"}},
+    {"transcript": "what's the weather like for a walk today", "reply": {"reply": "I can't see outside, sir. But a light jacket never hurt anyone. Shall I open the forecast?", "action": "none", "target": "", "confidence": 0.9, "requires_confirmation": False, "memory_type": "conversation"}},
+]
+
+
+class Latency:
+    """Distribusi latency lognormal: spec 'median' atau 'median,sigma' (detik)."""
+    def __init__(self, median, sigma=0.0, rng=None):
+        self.median = median
+        self.sigma = sigma
+        self.rng = rng or random.Random()
+
+    @classmethod
+    def parse(cls, spec, rng):
+        median, _, sigma = spec.partition(",")
+        return cls(float(median), float(sigma or 0.0), rng)
+
+    def sample(self):
+        return self.median * math.exp(self.sigma * self.rng.gauss(0.0, 1.0)) if self.sigma else self.median
+
+
+def install_headless_modules(window_title):
+    """
+    Modul desktop (window aktif, keyboard/mouse, buka app) diganti modul kosong: replay tidak
+    boleh menyentuh desktop. Harus dipanggil sebelum import kevin_core.
+    """
+    gw = types.ModuleType("pygetwindow")
+    gw.getActiveWindow = lambda: types.SimpleNamespace(title=window_title)
+    app_opener = types.ModuleType("AppOpener")
+    app_opener.open = app_opener.close = lambda *args, **kwargs: None
+    sys.modules.update({"pygetwindow": gw, "pyautogui": types.ModuleType("pyautogui"), "AppOpener": app_opener})
+
+
+def read_wav(path):
+    """WAV -> int16 mono SAMPLE_RATE (resample linear kalau rate beda)."""
+    with wave.open(path, "rb") as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        raw = f.readframes(f.getnframes())
+    if width != 2:
+        raise ValueError(f"{path}: hanya PCM 16-bit yang didukung")
+    samples = np.frombuffer(raw, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        n_out = int(len(samples) * SAMPLE_RATE / rate)
+        samples = np.interp(np.linspace(0, len(samples) - 1, n_out), np.arange(len(samples)), samples)
+    return samples.astype(np.int16)
+
+
+def write_wav(path, samples, rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+def load_turns(directory):
+    with open(os.path.join(directory, TURNS_FILE), encoding="utf-8") as f:
+        turns = [json.loads(line) for line in f if line.strip()]
+    for turn in turns:
+        turn["samples"] = read_wav(os.path.join(directory, turn["wav"]))
+    return turns
+
+
+def synth_speech(text, rng, rate=SAMPLE_RATE):
+    """Audio mirip suara (harmonik + envelope suku kata) dengan durasi sebanding panjang teks."""
+    duration = max(0.6, len(text) * 0.06)
+    t = np.arange(int(duration * rate)) / rate
+    f0 = rng.uniform(110, 180) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 4.0 * t) * 0.5 + 0.6, 0, 1)
+    return (voice * syllables * 2500).astype(np.int16)
+
+
+# --- Stand-in services ---
+
+class StandInServices:
+    """
+    Server aiohttp lokal yang meniru Groq (whisper + chat-completions, termasuk SSE streaming)
+    dan websocket edge-tts. Transkrip & jawaban diambil dari turn yang sedang diputar (current);
+    latency tiap endpoint diambil dari distribusi yang dikonfigurasi.
+    """
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.current = None
+        self.stats = {"models": 0, "transcriptions": 0, "chat": 0, "chat_stream": 0, "tts": 0, "cancelled": 0}
+        self._runner = None
+        self.port = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get("/openai/v1/models", self._models)
+        app.router.add_post("/openai/v1/audio/transcriptions", self._transcriptions)
+        app.router.add_post("/openai/v1/chat/completions", self._chat)
+        app.router.add_get("/edge/v1", self._tts)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{self.port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _reply_json(self):
+        reply = (self.current or {}).get("reply") or DEFAULT_REPLY
+        return json.dumps(reply)
+
+    async def _models(self, request):
+        self.stats["models"] += 1
+        return web.json_response({"object": "list", "data": []})
+
+    async def _transcriptions(self, request):
+        await request.read()  # Upload WAV tetap dibaca penuh, seperti server sungguhan
+        self.stats["transcriptions"] += 1
+        try:
+            await asyncio.sleep(self.latencies["stt"].sample())
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        return web.Response(text=(self.current or {}).get("transcript", "") + "\n", content_type="text/plain")
+
+    async def _chat(self, request):
+        body = await request.json()
+        content = self._reply_json()
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // LLM_CHARS_PER_TOKEN
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // LLM_CHARS_PER_TOKEN,
+                 "total_tokens": prompt_tokens + len(content) // LLM_CHARS_PER_TOKEN}
+        base = {"id": "chatcmpl-replay", "created": int(time.time()), "model": body.get("model", "replay")}
+        try:
+            if not body.get("stream"):
+                self.stats["chat"] += 1
+                await asyncio.sleep(self.latencies["llm_first"].sample() + self.latencies["llm_token"].sample() * usage["completion_tokens"])
+                return web.json_response(dict(base, object="chat.completion", usage=usage, choices=[
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]))
+            self.stats["chat_stream"] += 1
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            await asyncio.sleep(self.latencies["llm_first"].sample())
+            for i in range(0, len(content), LLM_CHARS_PER_TOKEN):
+                if i: await asyncio.sleep(self.latencies["llm_token"].sample())
+                chunk = dict(base, object="chat.completion.chunk", choices=[
+                    {"index": 0, "delta": {"content": content[i:i + LLM_CHARS_PER_TOKEN]}, "finish_reason": None}])
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            last = dict(base, object="chat.completion.chunk", x_groq={"usage": usage},
+                        choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            await response.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode())
+            await response.write_eof()
+            return response
+        except (asyncio.CancelledError, ConnectionResetError):
+            # Request yang kalah hedge / stream yang ditutup client
+            self.stats["cancelled"] += 1
+            raise
+
+    async def _tts(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats["tts"] += 1
+        text = ""
+        async for message in ws:
+            if message.type == WSMsgType.TEXT and "Path:ssml" in message.data:
+                match = re.search(r"<prosody[^>]*>(.*?)</prosody>", message.data, re.S)
+                text = match.group(1) if match else message.data
+                break
+        request_id = "X-RequestId:replay\r\n"
+        await ws.send_str(f"{request_id}Content-Type:application/json; charset=utf-8\r\nPath:turn.start\r\n\r\n{{}}")
+        n_frames = max(1, math.ceil(len(text.strip()) * SPEECH_SECONDS_PER_CHAR / MP3_FRAME_SECONDS))
+        header = f"{request_id}Content-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+        try:
+            await asyncio.sleep(self.latencies["tts_first"].sample())
+            for i in range(0, n_frames, TTS_FRAMES_PER_MESSAGE):
+                if i: await asyncio.sleep(self.latencies["tts_chunk"].sample())
+                frames = SILENT_MP3_FRAME * min(TTS_FRAMES_PER_MESSAGE, n_frames - i)
+                await ws.send_bytes(len(header).to_bytes(2, "big") + header + frames)
+            await ws.send_str(f"{request_id}Content-Type:application/json; charset=utf-8\r\nPath:turn.end\r\n\r\n{{}}")
+            async for _ in ws:
+                pass  # Tunggu client menutup koneksi
+        except (asyncio.CancelledError, ConnectionResetError):
+            self.stats["cancelled"] += 1
+            raise
+        return ws
+
+
+# --- File-backed audio devices ---
+
+def file_devices():
+    """Subclass device sungguhan: buffer/VAD/generation tetap kode asli, cuma I/O yang diganti file."""
+    from audio_core import MicStream
+    from tts_core import AudioOutput
+
+    class FileMic(MicStream):
+        """Mic dari timeline: noise ruangan real time terus-menerus, utterance disisipkan lewat say()."""
+        def __init__(self, seed=0, **kwargs):
+            super().__init__(**kwargs)
+            self._rng = np.random.default_rng(seed)
+            self._pending = np.zeros(0, dtype=np.int16)
+            self._lock = threading.Lock()
+            self._stop = threading.Event()
+            self.spoken = threading.Event()
+
+        def start(self):
+            threading.Thread(target=self._feed, daemon=True, name="file-mic").start()
+            print(f"{Fore.YELLOW}[SYSTEM] File mic opened ({self.rate} Hz, pre-roll {self.preroll_samples / self.rate:.1f}s).{Style.RESET_ALL}")
+
+        def say(self, samples):
+            with self._lock:
+                self._pending = np.concatenate((self._pending, samples))
+                self.spoken.clear()
+
+        def _feed(self):
+            next_time = time.perf_counter()
+            while not self._stop.is_set():
+                frame = (self._rng.standard_normal(FRAME_SAMPLES) * MIC_NOISE_RMS).astype(np.int16)
+                with self._lock:
+                    n = min(FRAME_SAMPLES, len(self._pending))
+                    if n:
+                        frame[:n] = self._pending[:n]
+                        self._pending = self._pending[n:]
+                        if not len(self._pending): self.spoken.set()
+                self.ring.write(frame)
+                next_time += FRAME_MS / 1000
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+
+        def close(self):
+            self._stop.set()
+
+    class FileSpeaker(AudioOutput):
+        """Speaker ke WAV: buffer dikuras real time seperti callback PyAudio, audio yang keluar ditulis ke file."""
+        def __init__(self, path, **kwargs):
+            super().__init__(**kwargs)
+            self.path = path
+            self._stop = threading.Event()
+            self._file = None
+
+        def start(self):
+            self._file = wave.open(self.path, "wb")
+            self._file.setnchannels(1)
+            self._file.setsampwidth(2)
+            self._file.setframerate(self.rate)
+            threading.Thread(target=self._drain, daemon=True, name="file-speaker").start()
+
+        def _drain(self):
+            need = self.frames_per_buffer * 2
+            period = self.frames_per_buffer / self.rate
+            next_time = time.perf_counter()
+            while not self._stop.is_set():
+                out = self._pull(need)
+                if out: self._file.writeframes(out)
+                next_time += period
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+            self._file.close()
+
+        def close(self):
+            self._stop.set()
+
+    return FileMic, FileSpeaker
+
+
+class ReplaySkills:
+    """Pengganti SkillDispatcher: action dicatat (dengan latency tiruan), desktop tidak disentuh."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.executed = []
+
+    def execute(self, data):
+        time.sleep(self.latency.sample())
+        self.executed.append({"action": data.get("action"), "target": data.get("target")})
+
+
+# --- Replay ---
+
+def reset_state(workdir):
+    """State agent (tts cache, memory, preference, traces) dimulai kosong supaya run bisa dibandingkan."""
+    os.makedirs(workdir, exist_ok=True)
+    for name in os.listdir(workdir):
+        path = os.path.join(workdir, name)
+        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+
+
+def build_agent(args, base_url, ws_port):
+    os.environ["GROQ_API_KEY"] = "replay"
+    os.environ["GROQ_BASE_URL"] = base_url
+    install_headless_modules(args.window)
+    import edge_tts.communicate
+    edge_tts.communicate.WSS_URL = f"ws://127.0.0.1:{ws_port}/edge/v1?TrustedClientToken=replay"
+    import kevin_core
+    from audio_core import BargeInMonitor
+    from memory_core import MemoryManager
+    from bench_memory import HashEmbedder
+    FileMic, FileSpeaker = file_devices()
+
+    agent = kevin_core.KevinAgent()
+    agent.mic = FileMic(seed=args.seed)
+    agent.speaker = FileSpeaker("speaker.wav")
+    agent.barge_in = BargeInMonitor(agent.mic, on_trigger=agent.speaker.flush, output_level=lambda: agent.speaker.level)
+    agent.skills = ReplaySkills(Latency.parse(args.skill, random.Random(args.seed)))
+
+    def init_memory():
+        # Numpy index + embedding hash: tanpa download model, hasil deterministik
+        agent.memory_db = MemoryManager(path="kevin_memory_index", backend="numpy", preferences=agent.preferences,
+                                        embedder=HashEmbedder() if args.embedder == "hash" else None)
+        agent.router.attach_embedder(agent.memory_db.embed)
+        agent.response_cache.attach_embedder(agent.memory_db.embed_query)
+    agent._init_memory = init_memory
+    # Replay mulai dari sesi aktif (wake word tidak ikut diukur)
+    agent.is_session_active = True
+    return agent
+
+
+async def wait_until(predicate, timeout, interval=0.02):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(interval)
+    return True
+
+
+def turn_metrics(record):
+    """Latency turn dihitung dari akhir capture (user selesai bicara + pause VAD) sampai aktivitas terakhir."""
+    marks = record["marks"]
+    if "capture_end" not in marks:
+        return None
+    ends = [s["end_ms"] for s in record["spans"] if s["end_ms"] is not None] + list(marks.values())
+    return {
+        "input": record.get("input"),
+        "intent": record.get("intent"),
+        "turn_latency_ms": round(max(ends) - marks["capture_end"], 1),
+        "time_to_first_audio_ms": record["derived_ms"].get("time_to_first_audio"),
+        "llm_first_token_ms": record["derived_ms"].get("llm_first_token"),
+    }
+
+
+def percentiles(values):
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1), "n": len(values)}
+
+
+async def replay(args):
+    turns = load_turns(args.dir) * args.repeat
+    rng = random.Random(args.seed)
+    latencies = {name: Latency.parse(getattr(args, name), rng) for name in ("stt", "llm_first", "llm_token", "tts_first", "tts_chunk")}
+    services = StandInServices(latencies)
+    base_url = await services.start()
+
+    cwd = os.getcwd()
+    reset_state(args.workdir)
+    os.chdir(args.workdir)
+    agent = build_agent(args, base_url, services.port)
+
+    records = []
+    end_turn = agent.tracer.end_turn
+    def collect():
+        record = end_turn()
+        if record: records.append(record)
+        return record
+    agent.tracer.end_turn = collect
+
+    t_boot = time.perf_counter()
+    agent.last_interaction_time = time.time()
+    run_task = asyncio.create_task(agent.run())
+    # Loop listen pertama = audio siap & "System initialized." selesai diucapkan
+    await wait_until(lambda: agent.tracer.turn is not None or run_task.done(), TURN_TIMEOUT)
+    boot_s = time.perf_counter() - t_boot
+    await wait_until(lambda: agent.is_ready("tts") and agent.is_ready("memory"), TURN_TIMEOUT)
+
+    timeouts = 0
+    t_start = time.perf_counter()
+    for i, turn in enumerate(turns):
+        await asyncio.sleep(args.gap)
+        services.current = turn
+        exported = len(records)
+        agent.mic.say(turn["samples"])
+        if not await wait_until(lambda: len(records) > exported or run_task.done(), TURN_TIMEOUT):
+            timeouts += 1
+            print(f"{Fore.RED}[REPLAY] Turn {i + 1} '{turn['transcript']}' timed out.{Style.RESET_ALL}")
+        if run_task.done():
+            break
+    wall_s = time.perf_counter() - t_start
+
+    run_task.cancel()
+    try:
+        await run_task
+    except (asyncio.CancelledError, Exception):
+        pass
+    os.chdir(cwd)
+    await services.stop()
+
+    metrics = [m for m in map(turn_metrics, records) if m]
+    speech_s = sum(len(t["samples"]) for t in turns) / SAMPLE_RATE
+    ttfa = [m["time_to_first_audio_ms"] for m in metrics if m["time_to_first_audio_ms"] is not None]
+    return {
+        "config": {name: getattr(args, name) for name in ("dir", "repeat", "gap", "seed", "embedder", "stt", "llm_first", "llm_token", "tts_first", "tts_chunk", "skill")},
+        "boot_s": round(boot_s, 3),
+        "turns": len(turns), "completed": len(metrics), "timeouts": timeouts,
+        "turn_latency": percentiles([m["turn_latency_ms"] for m in metrics]),
+        "time_to_first_audio": percentiles(ttfa),
+        "llm_first_token": percentiles([m["llm_first_token_ms"] for m in metrics if m["llm_first_token_ms"] is not None]),
+        "throughput": {
+            "wall_s": round(wall_s, 2),
+            "turns_per_min": round(len(metrics) / wall_s * 60, 2) if wall_s else 0.0,
+            # Di luar waktu user bicara + jeda antar turn: yang benar-benar dipakai agent
+            "agent_s_per_turn": round((wall_s - speech_s - args.gap * len(turns)) / max(1, len(metrics)), 3),
+        },
+        "stages": agent.tracer.summary(),
+        "services": services.stats,
+        "http_pool": agent.http_pool.reuse_info(),
+        "hedge": {"stt": agent.hedge_stt.stats(), "llm": agent.hedge_llm.stats()},
+        "skills": agent.skills.executed,
+        "rows": metrics,
+    }
+
+
+def synth(args):
+    os.makedirs(args.dir, exist_ok=True)
+    rng = random.Random(args.seed)
+    with open(os.path.join(args.dir, TURNS_FILE), "w", encoding="utf-8") as f:
+        for i, turn in enumerate(SYNTH_TURNS, 1):
+            name = f"turn_{i:03d}.wav"
+            write_wav(os.path.join(args.dir, name), synth_speech(turn["transcript"], rng))
+            f.write(json.dumps({"wav": name, **turn}, ensure_ascii=False) + "\n")
+    print(f"{Fore.GREEN}[REPLAY] {len(SYNTH_TURNS)} synthetic turns -> {args.dir}{Style.RESET_ALL}")
+
+
+def record(args):
+    """Rekam utterance dari mic sungguhan (butuh PyAudio); transkrip & jawaban kalengan diketik."""
+    from audio_core import MicStream
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, TURNS_FILE)
+    existing = sum(1 for _ in open(path, encoding="utf-8")) if os.path.exists(path) else 0
+    mic = MicStream()
+    mic.start()
+    mic.calibrate(duration=1)
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            for i in range(existing + 1, existing + args.count + 1):
+                print(f"{Fore.GREEN}[RECORD] Turn {i}: speak now...{Style.RESET_ALL}")
+                samples = mic.capture_utterance(timeout=15, phrase_limit=8)
+                if samples is None:
+                    print(f"{Fore.YELLOW}[RECORD] No speech, skipped.{Style.RESET_ALL}")
+                    continue
+                name = f"turn_{i:03d}.wav"
+                write_wav(os.path.join(args.dir, name), samples)
+                transcript = input("Transcript: ").strip()
+                reply = input("Canned reply JSON (kosong = default): ").strip()
+                f.write(json.dumps({"wav": name, "transcript": transcript, "reply": json.loads(reply) if reply else None}, ensure_ascii=False) + "\n")
+    finally:
+        mic.close()
+
+
+def print_report(report):
+    print(f"\n{Style.BRIGHT}Replay: {report['completed']}/{report['turns']} turns, {report['timeouts']} timeouts, boot {report['boot_s']:.2f}s")
+    for name in ("turn_latency", "time_to_first_audio", "llm_first_token"):
+        stats = report[name]
+        if stats:
+            print(f"  {name:<20} p50 {stats['p50_ms']:>8.1f}ms  p95 {stats['p95_ms']:>8.1f}ms  p99 {stats['p99_ms']:>8.1f}ms  (n={stats['n']})")
+    throughput = report["throughput"]
+    print(f"  throughput           {throughput['turns_per_min']:.1f} turns/min, agent {throughput['agent_s_per_turn']:.2f}s/turn")
+    print(f"  services             {report['services']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay turn WAV lewat KevinAgent.run() dengan stand-in Groq + edge-tts lokal.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_synth = sub.add_parser("synth", help="Buat corpus turn sintetis (tanpa rekaman)")
+    p_synth.add_argument("--dir", default=TURNS_DIR)
+    p_synth.add_argument("--seed", type=int, default=0)
+
+    p_record = sub.add_parser("record", help="Rekam turn dari mic sungguhan")
+    p_record.add_argument("--dir", default=TURNS_DIR)
+    p_record.add_argument("--count", type=int, default=5)
+
+    p_replay = sub.add_parser("replay", help="Putar corpus lewat agent, ukur latency")
+    p_replay.add_argument("--dir", default=TURNS_DIR)
+    p_replay.add_argument("--workdir", default=WORKDIR)
+    p_replay.add_argument("--repeat", type=int, default=1)
+    p_replay.add_argument("--gap", type=float, default=0.5, help="Jeda (detik) sebelum user bicara lagi")
+    p_replay.add_argument("--seed", type=int, default=0)
+    p_replay.add_argument("--window", default="Visual Studio Code", help="Judul window aktif tiruan")
+    p_replay.add_argument("--embedder", choices=["hash", "model"], default="hash")
+    # Latency stand-in: 'median' atau 'median,sigma' (lognormal, detik)
+    p_replay.add_argument("--stt", default="0.35,0.3")
+    p_replay.add_argument("--llm-first", dest="llm_first", default="0.45,0.4")
+    p_replay.add_argument("--llm-token", dest="llm_token", default="0.012,0.2")
+    p_replay.add_argument("--tts-first", dest="tts_first", default="0.25,0.3")
+    p_replay.add_argument("--tts-chunk", dest="tts_chunk", default="0.04,0.2")
+    p_replay.add_argument("--skill", default="0.05,0.3")
+    p_replay.add_argument("--out", default="bench_replay.json")
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        synth(args)
+    elif args.command == "record":
+        record(args)
+    else:
+        report = asyncio.run(replay(args))
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print_report(report)
+        print(f"{Fore.GREEN}Saved -> {args.out}{Style.RESET_ALL}")
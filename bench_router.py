@@ -0,0 +1,92 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from colorama import Fore, Style, init
+
+from command_router import CommandRouter, ROUTER_EXAMPLES, _clean
+
+init(autoreset=True)
+
+CORPUS_PATH = "command_corpus.jsonl"
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def training_overlap(corpus, examples=ROUTER_EXAMPLES):
+    """Utterance corpus yang juga contoh centroid (harus kosong: corpus = data held-out)."""
+    phrases = {_clean(phrase) for group in examples.values() for phrase in group}
+    return [item["text"] for item in corpus if _clean(item["text"]) in phrases]
+
+
+def is_correct(decision, expected):
+    """Benar kalau: expected None -> fallback ke LLM; selain itu semua field expected cocok."""
+    if expected is None:
+        return decision is None
+    if decision is None:
+        return False
+    return all(str(decision.get(key, "")).lower() == str(value).lower() for key, value in expected.items())
+
+
+def evaluate(router, corpus, repeats=20):
+    rows, latencies = [], []
+    for item in corpus:
+        samples = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            decision = router.route(item["text"])
+            samples.append((time.perf_counter() - t0) * 1000)
+        latencies.extend(samples)
+        rows.append({"text": item["text"], "expected": item["expected"], "decision": decision,
+                     "correct": is_correct(decision, item["expected"]), "median_ms": float(np.median(samples))})
+
+    commands = [r for r in rows if r["expected"] is not None]
+    others = [r for r in rows if r["expected"] is None]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "accuracy": sum(r["correct"] for r in rows) / len(rows),
+        "command_recall": sum(r["correct"] for r in commands) / max(1, len(commands)),
+        # Salah route = eksekusi yang tidak diminta; ini yang paling mahal
+        "false_route_rate": sum(r["decision"] is not None for r in others) / max(1, len(others)),
+        "routed_rate": sum(r["decision"] is not None for r in rows) / len(rows),
+        "latency_ms": {"p50": round(float(p50), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4)},
+        "rows": rows,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Akurasi + latency CommandRouter pada corpus berlabel.")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--no-embedder", action="store_true", help="Grammar saja (tanpa nearest-centroid)")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--out", default="bench_router.json")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    overlap = training_overlap(corpus)
+    if overlap:
+        print(f"{Fore.RED}[BENCH] Corpus overlaps ROUTER_EXAMPLES (not held-out): {overlap}{Style.RESET_ALL}")
+        sys.exit(1)
+
+    router = CommandRouter()
+    if not args.no_embedder:
+        from memory_core import load_embedder
+        embedder = load_embedder()
+        router.attach_embedder(lambda texts: embedder.encode(texts, normalize_embeddings=True))
+    report = evaluate(router, corpus, args.repeats)
+    report["mode"] = "grammar" if args.no_embedder else "grammar+centroid"
+    report["router_stats"] = router.stats
+
+    for row in report["rows"]:
+        if not row["correct"]:
+            print(f"{Fore.RED}[MISS] '{row['text']}' expected {row['expected']} got {row['decision']}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}[BENCH] {report['mode']}: accuracy {report['accuracy']:.1%}, command recall {report['command_recall']:.1%}, "
+          f"false route {report['false_route_rate']:.1%}, latency p50 {report['latency_ms']['p50']}ms "
+          f"p99 {report['latency_ms']['p99']}ms{Style.RESET_ALL}")
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"{Fore.YELLOW}[BENCH] Saved to {args.out}{Style.RESET_ALL}")
@@ -0,0 +1,182 @@
+import re
+from difflib import SequenceMatcher
+import numpy as np
+from colorama import Fore, Style
+
+ROUTER_THRESHOLD = 0.75   # Di bawah ini -> fallback ke LLM
+CENTROID_MARGIN = 0.05    # Selisih minimal centroid terbaik vs kedua
+MAX_ROUTE_WORDS = 8       # Kalimat panjang hampir pasti butuh LLM
+AMBIGUOUS_TARGETS = {"it", "that", "this", "itu", "ini", "nya", "tersebut", "yang", "tadi", "aplikasi", "app"}
+COMPOUND_WORDS = {"terus", "trus", "lalu", "dan", "kemudian", "habis", "and", "then"}  # Multi-step -> LLM
+MAX_TARGET_WORDS = 3
+UNKNOWN_TARGET_CONFIDENCE = 0.5   # Target bukan app yang dikenal -> di bawah threshold -> LLM
+FUZZY_TARGET_RATIO = 0.85         # Toleransi typo STT ("spotifi" -> spotify)
+
+# Nama app yang aman dibuka/ditutup lokal; ditambah daftar app terinstall dari AppOpener kalau ada
+KNOWN_APPS = {
+    "notepad", "chrome", "google chrome", "firefox", "edge", "microsoft edge", "brave", "opera",
+    "spotify", "discord", "whatsapp", "telegram", "slack", "zoom", "teams", "microsoft teams",
+    "visual studio code", "vs code", "vscode", "sublime", "pycharm", "calculator", "kalkulator",
+    "word", "excel", "powerpoint", "outlook", "notion", "obsidian", "steam", "vlc", "netflix",
+    "file explorer", "explorer", "terminal", "cmd", "command prompt", "powershell", "paint",
+    "settings", "task manager",
+}
+
+_POLITE = r"(?:(?:tolong|coba|please|kevin|dong|ya|deh)\s+)*"
+_TAIL = r"(?:\s+(?:dong|ya|deh|please|sekarang|now))*"
+
+# (label, pattern). Label "media:<command>" / "scroll:<arah>" / "open" / "close" / "system".
+# Tidak ada "type": isi ketikan selalu lewat LLM (verb "tulis" juga dipakai untuk minta dibuatkan teks).
+GRAMMAR = [
+    ("open", r"(?:buka|bukain|bukakan|open|jalankan|launch)\s+(?:aplikasi\s+|app\s+|the\s+)?(?P<target>[\w .+-]{1,30}?)"),
+    ("close", r"(?:tutup|tutupin|close|quit)\s+(?:aplikasi\s+|app\s+|the\s+)?(?P<target>[\w .+-]{1,30}?)"),
+    ("media:next", r"(?:next|skip)(?:\s+(?:song|track|lagu))?|(?:lagu|track)\s+(?:selanjutnya|berikutnya)|(?:ganti|skip|lewati)\s+lagu(?:nya)?"),
+    ("media:prev", r"(?:prev|previous)(?:\s+(?:song|track|lagu))?|(?:lagu|track)\s+sebelumnya|balik\s+ke\s+lagu\s+sebelumnya"),
+    ("media:play_pause", r"(?:pause|resume|jeda)(?:\s+(?:the\s+)?(?:music|musik|lagu|lagunya|song))?|(?:play|stop|lanjutkan)\s+(?:the\s+)?(?:music|musik|lagu|lagunya|song)|(?:putar|setel)\s+(?:lagi|musik|lagu)"),
+    ("media:volume_up", r"(?:volume|turn\s+(?:the\s+)?volume)\s+up|(?:naikkan|naikin|besarkan|gedein|kerasin)\s+(?:volume|suara)(?:nya)?"),
+    ("media:volume_down", r"(?:volume|turn\s+(?:the\s+)?volume)\s+down|(?:turunkan|turunin|kecilkan|kecilin|pelanin)\s+(?:volume|suara)(?:nya)?"),
+    ("media:mute", r"(?:mute|unmute)(?:\s+(?:audio|sound|suara))?|(?:bisukan|matikan)\s+suara(?:nya)?"),
+    ("scroll:down", r"scroll\s+down|(?:gulir|scroll)\s+(?:ke\s+)?bawah"),
+    ("scroll:up", r"scroll\s+up|(?:gulir|scroll)\s+(?:ke\s+)?atas"),
+    ("system", r"(?P<target>shutdown|shut\s+down|matikan\s+(?:pc|komputer|laptop))"),
+]
+_COMPILED = [(label, re.compile(rf"^{_POLITE}(?:{pattern}){_TAIL}$", re.IGNORECASE)) for label, pattern in GRAMMAR]
+
+# Contoh per label untuk nearest-centroid (label "none" = bukan command lokal -> LLM)
+ROUTER_EXAMPLES = {
+    "media:next": ["lagu selanjutnya", "ganti lagu dong", "next song please", "skip this track", "puter lagu berikutnya"],
+    "media:prev": ["lagu sebelumnya", "previous track", "balik ke lagu tadi", "go back one song"],
+    "media:play_pause": ["pause musiknya", "stop the music", "lanjutin lagunya", "resume playback", "jeda dulu lagunya"],
+    "media:volume_up": ["gedein suaranya", "volume naik", "louder please", "naikin volume dikit", "turn it up"],
+    "media:volume_down": ["kecilin suaranya", "volume turun", "quieter please", "pelanin dikit suaranya", "turn it down"],
+    "media:mute": ["bisukan suara", "mute audio", "diamkan suaranya", "matiin suara"],
+    "scroll:down": ["scroll ke bawah", "turun ke bawah halamannya", "scroll down a bit", "geser ke bawah"],
+    "scroll:up": ["scroll ke atas", "naik ke atas halamannya", "scroll up a bit", "geser ke atas"],
+    "none": ["apa kabar kevin", "ceritain lelucon dong", "what's the weather like", "siapa presiden indonesia",
+             "kamu bisa apa aja", "jelaskan machine learning", "aku lagi capek banget", "buatkan rencana belajar",
+             "kirim email ke bos soal rapat besok", "cari resep nasi goreng terus simpan di catatan"],
+}
+_SLOTLESS = {label for label in ROUTER_EXAMPLES if label != "none"}
+
+REPLIES = {
+    "media:next": "Next.", "media:prev": "Previous.", "media:play_pause": "Done.",
+    "media:volume_up": "Volume up.", "media:volume_down": "Volume down.", "media:mute": "Muted.",
+    "scroll:down": "Scrolling.", "scroll:up": "Scrolling.",
+}
+SCROLL_AMOUNT = 500
+
+
+def _clean(text):
+    return " ".join(text.lower().strip(" .,!?").split())
+
+
+def installed_app_names():
+    """Nama app dari index AppOpener (kosong kalau AppOpener tidak tersedia)."""
+    try:
+        from AppOpener import give_appnames
+        return {_clean(name) for name in give_appnames()}
+    except Exception:
+        return set()
+
+
+def build_decision(label, slots=None, confidence=0.95):
+    """Label + slot -> dict yang sama bentuknya dengan output LLM (lihat PROMPT_CORE)."""
+    slots = slots or {}
+    decision = {"reply": REPLIES.get(label, "Done."), "action": label.split(":")[0], "target": "",
+                "confidence": round(float(confidence), 3), "requires_confirmation": False, "memory_type": "skip"}
+    if label.startswith("media:"):
+        decision["command"] = label.split(":")[1]
+    elif label.startswith("scroll:"):
+        decision["amount"] = -SCROLL_AMOUNT if label.endswith("down") else SCROLL_AMOUNT
+    elif label in ("open", "close"):
+        decision["target"] = slots["target"]
+        decision["reply"] = f"{'Opening' if label == 'open' else 'Closing'} {slots['target']}."
+    elif label == "system":
+        decision["target"] = "shutdown"
+        decision["reply"] = "Shutting down?"
+        decision["requires_confirmation"] = True  # Destructive: tetap lewat konfirmasi
+    return decision
+
+
+class CommandRouter:
+    """
+    Fast path command lokal: grammar verb/target (ID + EN) dulu, lalu nearest-centroid
+    embedding untuk command tanpa slot (media, scroll). Hasilnya dict yang langsung bisa
+    dieksekusi SkillDispatcher; None kalau tidak yakin (-> LLM).
+    """
+    def __init__(self, threshold=ROUTER_THRESHOLD, margin=CENTROID_MARGIN, examples=ROUTER_EXAMPLES, known_apps=None):
+        self.threshold = threshold
+        self.margin = margin
+        self.examples = examples
+        self.known_apps = set(known_apps) if known_apps is not None else KNOWN_APPS | installed_app_names()
+        self.labels = []
+        self.centroids = None
+        self._embed = None
+        self.stats = {"grammar": 0, "centroid": 0, "fallback": 0}
+
+    def attach_embedder(self, embed):
+        """Pasang fungsi embed (list teks -> vektor ternormalisasi) dan hitung centroid sekali."""
+        labels, centroids = [], []
+        for label, phrases in self.examples.items():
+            vectors = np.asarray(embed(phrases), dtype=np.float32)
+            centroid = vectors.mean(axis=0)
+            labels.append(label)
+            centroids.append(centroid / (np.linalg.norm(centroid) + 1e-8))
+        self.labels, self.centroids = labels, np.stack(centroids)
+        self._embed = embed
+        print(f"{Fore.YELLOW}[ROUTER] Centroid classifier ready ({len(labels)} labels).{Style.RESET_ALL}")
+
+    def match_grammar(self, text):
+        cleaned = _clean(text)
+        for label, pattern in _COMPILED:
+            match = pattern.match(cleaned)
+            if not match:
+                continue
+            slots = {k: v.strip() for k, v in match.groupdict().items() if v}
+            target_words = slots.get("target", "").lower().split()
+            if len(target_words) > MAX_TARGET_WORDS or AMBIGUOUS_TARGETS.union(COMPOUND_WORDS).intersection(target_words):
+                return None
+            confidence = 0.95
+            if label in ("open", "close"):
+                slots["target"], score = self.score_target(slots["target"])
+                confidence *= score
+            return build_decision(label, slots, confidence=confidence)
+        return None
+
+    def score_target(self, target):
+        """Return (nama app, skor 0..1): 1.0 kalau persis app yang dikenal, rasio fuzzy kalau mirip."""
+        target = target.lower()
+        if target in self.known_apps:
+            return target, 1.0
+        best, ratio = max(((name, SequenceMatcher(None, target, name).ratio()) for name in self.known_apps),
+                          key=lambda item: item[1], default=(target, 0.0))
+        if ratio >= FUZZY_TARGET_RATIO:
+            return best, ratio
+        return target, UNKNOWN_TARGET_CONFIDENCE
+
+    def classify(self, text):
+        """Return (label, skor) centroid terdekat, atau (None, 0.0) kalau embedder belum siap."""
+        if self.centroids is None:
+            return None, 0.0
+        vector = np.asarray(self._embed([_clean(text)])[0], dtype=np.float32)
+        sims = self.centroids @ vector
+        order = np.argsort(-sims)
+        best, second = sims[order[0]], sims[order[1]] if len(order) > 1 else -1.0
+        if best - second < self.margin:
+            return None, float(best)
+        return self.labels[order[0]], float(best)
+
+    def route(self, text):
+        if len(_clean(text).split()) > MAX_ROUTE_WORDS:
+            self.stats["fallback"] += 1
+            return None
+        decision = self.match_grammar(text)
+        if decision and decision["confidence"] >= self.threshold:
+            self.stats["grammar"] += 1
+            return decision
+        label, score = self.classify(text)
+        if label in _SLOTLESS and score >= self.threshold:
+            self.stats["centroid"] += 1
+            return build_decision(label, confidence=score)
+        self.stats["fallback"] += 1
+        return None
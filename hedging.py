@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+from collections import deque
+import numpy as np
+from colorama import Fore, Style
+
+HEDGE_QUANTILE = 95          # Hedge dikirim setelah latency persentil ini
+HEDGE_MIN_SAMPLES = 20       # Sebelum cukup sampel, pakai default delay
+HEDGE_DEFAULT_DELAY = {"stt": 1.5, "llm": 2.5}
+HEDGE_MIN_DELAY = {"stt": 0.3, "llm": 0.6}
+HEDGE_MAX_RATE = 0.10        # Maksimal 10% request (rolling) boleh di-hedge -> biaya terbatas
+HEDGE_HISTORY = 200
+
+
+def hedging_enabled():
+    """KEVIN_HEDGING=0 untuk run pembanding. Dibaca saat Hedger dibuat (setelah .env di-load)."""
+    return os.getenv("KEVIN_HEDGING", "1") != "0"
+
+
+class HedgeBudget:
+    """Batas global rate hedge (dibagi semua stage) atas HEDGE_HISTORY request terakhir."""
+    def __init__(self, max_rate=HEDGE_MAX_RATE, history=HEDGE_HISTORY):
+        self.max_rate = max_rate
+        self._recent = deque(maxlen=history)
+
+    def record(self, hedged):
+        self._recent.append(bool(hedged))
+
+    def allow(self):
+        if not self._recent:
+            return self.max_rate > 0
+        return (sum(self._recent) + 1) / (len(self._recent) + 1) <= self.max_rate
+
+
+class Hedger:
+    """
+    Request hedging per stage: kalau request pertama belum selesai setelah delay (p95
+    latency terbaru), kirim duplikat; yang selesai duluan menang, sisanya di-cancel.
+    """
+    def __init__(self, stage, budget, enabled=None):
+        self.stage = stage
+        self.budget = budget
+        self.enabled = hedging_enabled() if enabled is None else enabled
+        self.latencies = deque(maxlen=HEDGE_HISTORY)
+        self.counts = {"requests": 0, "hedged": 0, "hedge_wins": 0, "capped": 0}
+
+    def delay(self):
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY[self.stage]
+        return max(HEDGE_MIN_DELAY[self.stage], float(np.percentile(self.latencies, HEDGE_QUANTILE)))
+
+    async def run(self, make_request, on_cancel=None):
+        """
+        make_request() -> coroutine baru tiap dipanggil. on_cancel(result) dipanggil untuk
+        hasil pihak yang kalah kalau sudah terlanjur selesai bersamaan (mis. tutup stream).
+        """
+        self.counts["requests"] += 1
+        t_start = time.perf_counter()
+        primary = asyncio.create_task(make_request())
+        tasks = {primary}
+        hedged = False
+        winner, done = None, set()
+        try:
+            if self.enabled:
+                done, _ = await asyncio.wait(tasks, timeout=self.delay())
+                if not done:
+                    if self.budget.allow():
+                        hedged = True
+                        self.counts["hedged"] += 1
+                        tasks.add(asyncio.create_task(make_request()))
+                    else:
+                        self.counts["capped"] += 1
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if not t.exception()), None)
+                tasks -= done
+                if winner or not tasks:
+                    break
+            if winner is None:
+                raise next(iter(done)).exception()
+            elapsed = time.perf_counter() - t_start
+            self.latencies.append(elapsed)
+            if hedged and winner is not primary:
+                self.counts["hedge_wins"] += 1
+                print(f"{Fore.LIGHTBLACK_EX}[HEDGE] {self.stage}: hedge won ({elapsed:.2f}s){Style.RESET_ALL}")
+            return winner.result()
+        finally:
+            self.budget.record(hedged)
+            for task in tasks:
+                task.cancel()
+            if on_cancel:
+                for task in done:
+                    if task is not winner and not task.cancelled() and not task.exception():
+                        on_cancel(task.result())
+
+    def stats(self):
+        info = dict(self.counts, delay_s=round(self.delay(), 3))
+        info["hedge_rate"] = round(self.counts["hedged"] / self.counts["requests"], 3) if self.counts["requests"] else 0.0
+        if self.latencies:
+            p50, p95, p99 = np.percentile(self.latencies, [50, 95, 99])
+            info.update(p50_s=round(float(p50), 3), p95_s=round(float(p95), 3), p99_s=round(float(p99), 3))
+        info["enabled"] = self.enabled
+        return info
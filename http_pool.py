@@ -0,0 +1,102 @@
+import asyncio
+import weakref
+import httpx
+from colorama import Fore, Style
+
+# --- HTTP POOL CONFIG ---
+HTTP_MAX_CONNECTIONS = 10
+HTTP_MAX_KEEPALIVE = 4
+HTTP_KEEPALIVE_EXPIRY = 90.0      # Detik koneksi idle boleh disimpan di pool
+HTTP_TIMEOUTS = {"connect": 3.0, "read": 20.0, "write": 10.0, "pool": 2.0}
+KEEPALIVE_PING_INTERVAL = 25.0    # Ping selama sesi aktif (harus < expiry pool & idle timeout server)
+TTS_DNS_CACHE_TTL = 600
+
+
+def http2_available():
+    try:
+        import h2  # noqa: F401  (httpx butuh paket h2 untuk HTTP/2)
+        return True
+    except ImportError:
+        return False
+
+
+class SharedHttpPool:
+    """
+    Satu httpx.AsyncClient untuk semua traffic Groq (whisper + chat): satu pool koneksi,
+    HTTP/2 kalau paket h2 ada. Metrics reuse dihitung dari network stream tiap response
+    (stream yang sudah pernah terlihat = koneksi dipakai ulang).
+    """
+    def __init__(self, max_connections=HTTP_MAX_CONNECTIONS, max_keepalive=HTTP_MAX_KEEPALIVE,
+                 keepalive_expiry=HTTP_KEEPALIVE_EXPIRY, timeouts=HTTP_TIMEOUTS):
+        self.http2 = http2_available()
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=keepalive_expiry),
+            timeout=httpx.Timeout(**timeouts),
+            event_hooks={"response": [self._on_response]},
+        )
+        self._seen_streams = weakref.WeakSet()
+        self.stats = {"requests": 0, "new_connections": 0, "reused": 0, "pings": 0}
+        self.http_versions = {}
+
+    async def _on_response(self, response):
+        self.stats["requests"] += 1
+        version = response.http_version
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            if stream in self._seen_streams:
+                self.stats["reused"] += 1
+            else:
+                self.stats["new_connections"] += 1
+                self._seen_streams.add(stream)
+        except TypeError:
+            pass  # Stream tidak bisa di-weakref: lewati metrics
+
+    def reuse_info(self):
+        info = dict(self.stats, http_versions=dict(self.http_versions))
+        counted = self.stats["reused"] + self.stats["new_connections"]
+        info["reuse_rate"] = round(self.stats["reused"] / counted, 3) if counted else 0.0
+        return info
+
+    async def keepalive(self, ping, is_active, idle_since, interval=KEEPALIVE_PING_INTERVAL):
+        """
+        Loop background: selama sesi aktif, ping kalau koneksi sudah idle >= interval
+        supaya tidak ditutup server. idle_since() -> detik sejak request terakhir.
+        """
+        while True:
+            await asyncio.sleep(interval / 2)
+            if not is_active() or idle_since() < interval:
+                continue
+            try:
+                await ping()
+                self.stats["pings"] += 1
+            except Exception as e:
+                print(f"{Fore.LIGHTBLACK_EX}[HTTP] Keep-alive ping failed: {e}{Style.RESET_ALL}")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def make_tts_connector(limit=4):
+    """
+    Connector aiohttp bersama untuk edge-tts (DNS cache + batas koneksi). edge-tts membuat
+    ClientSession per kalimat yang menutup connector-nya, jadi close() dibuat no-op dan
+    connector baru benar-benar ditutup lewat shutdown(). Return None kalau aiohttp tidak ada.
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        return None
+
+    class SharedConnector(aiohttp.TCPConnector):
+        def close(self, *, abort_ssl=False):
+            return asyncio.sleep(0)
+
+        async def shutdown(self):
+            await super().close()
+
+    return SharedConnector(limit=limit, ttl_dns_cache=TTS_DNS_CACHE_TTL, keepalive_timeout=HTTP_KEEPALIVE_EXPIRY)
@@ -2,21 +2,29 @@ import asyncio
 import os
 import re
 import json
-import speech_recognition as sr
-from groq import Groq, AsyncGroq
+from groq import AsyncGroq
 from dotenv import load_dotenv
-import edge_tts
-import pygame
 from colorama import init, Fore, Style
 import time
-import uuid
 import random
 
 # --- CUSTOM MODULES ---
 from memory_core import MemoryManager 
+from preference_store import PreferenceStore
+from command_router import CommandRouter
+from response_cache import ResponseCache
+from prompt_builder import PromptBuilder
+from speculation import Speculator
+from hedging import HedgeBudget, Hedger
+from http_pool import SharedHttpPool, make_tts_connector, KEEPALIVE_PING_INTERVAL
+from tracing import Tracer
 from pc_control import PCControlManager
 from context_manager import get_active_window
 from skills_registry import SkillDispatcher 
+from audio_core import MicStream, BargeInMonitor, encode_wav
+from wakeword_core import WakeWordSpotter
+from llm_stream import IncrementalReplyParser, SentenceChunker
+from tts_core import AudioOutput, SynthesisPipeline, TTSCache, report_tts_error
 
 # --- SETUP ---
 init()
@@ -28,32 +36,72 @@ if not os.getenv("GROQ_API_KEY"):
 
 WAKE_WORD = "kevin"
 AUTO_SLEEP_TIMEOUT = 60
-TEMP_INPUT_FILE = "temp_input.wav"
+RECALL_DEADLINE = 0.35  # Detik; lewat dari ini recall di-skip supaya LLM tidak tertahan
+STT_UPLOAD_NAME = "input.wav"  # Nama file virtual untuk upload (tidak pernah ditulis ke disk)
 
 # Ack Sets
 ACKS_COMMAND = ["On it.", "Sure.", "Right away.", "Working on it.", "Executing."]
 ACKS_CONVERSATION = ["Hmm.", "Let's see.", "Okay.", "Alright.", "Thinking."]
 ACKS_CLARIFICATION = ["Which one?", "Can you be specific?", "Say again?", "Which app?"]
 
+# Frasa tetap yang di-preload ke sound bank (PCM di memory) saat startup
+PRELOAD_PHRASES = ACKS_COMMAND + ACKS_CONVERSATION + ACKS_CLARIFICATION + [
+    "System initialized.", "Confirmed.", "Cancelled.", "Are you sure?", "Standing by.",
+    "Still thinking...", "Yes?", "Never mind.", "Reset done.",
+]
+
 class KevinAgent:
     def __init__(self):
         # Clients
-        self.client_whisper = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.client_chat = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+        # Satu pool HTTP (HTTP/2 kalau ada) untuk whisper + chat: koneksi dipakai ulang antar turn
+        self.http_pool = SharedHttpPool()
+        self.client_whisper = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=self.http_pool.client)
+        self.client_chat = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=self.http_pool.client)
+        self.tts_connector = None  # Connector aiohttp edge-tts, dibuat di start() (butuh event loop)
+        self.keepalive_task = None
+        # Hedging STT/LLM: duplikat request setelah p95, rate hedge dibatasi global
+        self.hedge_budget = HedgeBudget()
+        self.hedge_stt = Hedger("stt", self.hedge_budget)
+        self.hedge_llm = Hedger("llm", self.hedge_budget)
+        # Span tree per turn -> kevin_traces.jsonl (rotating) + p50/p95/p99 per stage (tracer.summary())
+        self.tracer = Tracer()
         
         # Managers
-        self.memory_db = MemoryManager()
+        self.memory_db = None  # Diisi di background oleh start() (Chroma + embedding model)
+        self.pending_memories = []  # Memory dari turn sebelum memory siap; dikirim begitu siap
+        self.preferences = PreferenceStore()  # Slot -> value, dipakai command turn tanpa vector search
+        self.router = CommandRouter()  # Grammar lokal; classifier centroid aktif setelah memory siap
+        self.response_cache = ResponseCache()  # Keputusan LLM untuk prompt yang (hampir) sama
+        self.reply_from_cache = False  # Jawaban turn terakhir diambil dari response cache
+        # Pre-work dari onset speech: window, warm-up koneksi, recall dari transkrip parsial
+        self.speculator = Speculator(
+            snapshot_window=get_active_window,
+            warm=self._warm_connections,
+            transcribe_partial=self._transcribe_partial,
+            recall=lambda text: self._recall(text, "conversation"),
+            read_audio=lambda onset_pos: self.mic.ring.read(onset_pos - self.mic.preroll_samples, self.mic.position),
+            # Saat idle onset belum tentu untuk Kevin (wake word dicek setelah capture) -> tanpa pre-work
+            allow_prework=lambda: not self._is_idle(),
+            voice_gap=lambda: self.mic.trailing_silence(),
+            # Sesi aktif di-ping tiap KEEPALIVE_PING_INTERVAL; lebih lama dari itu koneksi dianggap dingin
+            warm_idle=KEEPALIVE_PING_INTERVAL,
+        )
         self.pc_controller = PCControlManager()
         self.skills = SkillDispatcher(self.pc_controller)
         
-        # Audio Init
-        pygame.mixer.init()
-        self.recognizer = sr.Recognizer()
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
-        
-        with sr.Microphone() as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+        # Audio objects (device baru dibuka di start())
+        # Output audio persistent: PCM hasil decode streaming langsung didorong ke sini
+        self.speaker = AudioOutput()
+        self.tts_cache = TTSCache()
+        # Satu stream mic persistent (ring buffer + pre-roll), dibuka sekali saja
+        self.mic = MicStream()
+        # Barge-in diputuskan lokal (VAD), monitor langsung flush speaker dari thread-nya
+        self.barge_in = BargeInMonitor(self.mic, on_trigger=self.speaker.flush, output_level=lambda: self.speaker.level)
+        self.wake_spotter = None
+        self.last_utterance = None
+
+        # Readiness gate per subsystem (task asyncio, diisi di start())
+        self.ready = {}
         
         # State Variables
         self.is_session_active = False
@@ -68,6 +116,8 @@ class KevinAgent:
         # Stabilization Tracking
         self.last_speech_end_time = 0
         self.last_barge_in_time = 0
+        self.stream_sentence_count = 0
+        self.speech_lock = asyncio.Lock()  # Satu output audio: serialisasi playback antar task
 
         # --- PROMPTS (EPIC 4 REFINED) ---
         self.PROMPT_CORE = """
@@ -103,31 +153,199 @@ class KevinAgent:
         - Reply with MAX 3 WORDS.
         - IF UNSURE: Ask immediately.
         """
+        # Di-minify sekali di sini; think() cuma menambahkan bagian dinamis
+        self.prompt_builder = PromptBuilder(self.PROMPT_CORE, {
+            "command": self.PROMPT_MODE_COMMAND,
+            "conversation": self.PROMPT_MODE_CONVERSATION,
+        })
 
-    def listen(self, timeout=5, phrase_limit=5):
-        with sr.Microphone() as source:
-            if self.awaiting_confirmation:
-                print(f"{Fore.YELLOW}[CONFIRM?] Waiting for YES/NO...{Style.RESET_ALL}", end="\r")
-            elif self.awaiting_clarification:
-                 print(f"{Fore.YELLOW}[CLARIFY] Waiting for detail...{Style.RESET_ALL}", end="\r")
-            elif self.is_session_active:
-                print(f"{Fore.GREEN}[LISTENING]...{Style.RESET_ALL}", end="\r")
-            else:
-                print(f"{Fore.BLACK}{Style.BRIGHT}[IDLE] Waiting...   {Style.RESET_ALL}", end="\r")
-            
-            try:
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
-                with open(TEMP_INPUT_FILE, "wb") as f: f.write(audio.get_wav_data())
-                with open(TEMP_INPUT_FILE, "rb") as file_obj:
-                    transcription = self.client_whisper.audio.transcriptions.create(
-                        file=(TEMP_INPUT_FILE, file_obj.read()),
-                        model="whisper-large-v3",
-                        response_format="text", language="id" 
-                    )
-                text = transcription.strip()
-                if text: print(f"{Fore.LIGHTBLACK_EX}> Input: {text}{Style.RESET_ALL}")
-                return text
-            except Exception: return None
+    async def start(self):
+        """
+        Startup bertahap & paralel: audio, memory, dan sound bank TTS di-init bersamaan
+        di background. Return begitu audio siap; memory menyusul (recall di-skip sampai warm).
+        """
+        t_start = time.perf_counter()
+        self.tts_connector = make_tts_connector()
+        self.ready = {
+            "audio": asyncio.create_task(asyncio.to_thread(self._init_audio)),
+            "memory": asyncio.create_task(asyncio.to_thread(self._init_memory)),
+            "tts": asyncio.create_task(self.tts_cache.preload(PRELOAD_PHRASES, connector=self.tts_connector)),
+            "network": asyncio.create_task(self._warm_connections()),
+        }
+        self.keepalive_task = asyncio.create_task(self.http_pool.keepalive(
+            self._ping, is_active=lambda: self.is_session_active, idle_since=self.speculator.idle_seconds))
+        for name, task in self.ready.items():
+            task.add_done_callback(lambda t, name=name: self._report_ready(name, t, t_start))
+        self.ready["memory"].add_done_callback(lambda t: self._drain_pending_memories())
+        await self.ready["audio"]
+
+    def _report_ready(self, name, task, t_start):
+        if task.cancelled(): return
+        if task.exception():
+            print(f"{Fore.RED}[STARTUP] {name} failed: {task.exception()} (degraded mode){Style.RESET_ALL}")
+        else:
+            print(f"{Fore.LIGHTBLACK_EX}[STARTUP] {name} ready in {time.perf_counter() - t_start:.2f}s{Style.RESET_ALL}")
+
+    def is_ready(self, name):
+        task = self.ready.get(name)
+        return bool(task and task.done() and not task.cancelled() and task.exception() is None)
+
+    def _init_audio(self):
+        self.speaker.start()
+        self.mic.start()
+        self.mic.calibrate(duration=1)
+        # Wake word lokal: saat idle, audio baru dikirim ke STT kalau "kevin" terdeteksi
+        self.wake_spotter = WakeWordSpotter()
+
+    def _init_memory(self):
+        self.memory_db = MemoryManager(preferences=self.preferences)
+        # Pakai embedder yang sama untuk centroid router (tanpa load model kedua)
+        self.router.attach_embedder(self.memory_db.embed)
+        self.response_cache.attach_embedder(self.memory_db.embed_query)
+
+    def _drain_pending_memories(self):
+        """Memory selesai warming up: kirim memory yang ditahan selama startup ke write-behind."""
+        pending, self.pending_memories = self.pending_memories, []
+        if not pending:
+            return
+        if not self.is_ready("memory"):
+            print(f"{Fore.RED}[MEMORY] Init failed, dropped {len(pending)} buffered memories.{Style.RESET_ALL}")
+            return
+        print(f"{Fore.LIGHTBLACK_EX}[MEMORY] Storing {len(pending)} memories buffered during startup.{Style.RESET_ALL}")
+        for user_input, reply_text, memory_type in pending:
+            self.memory_db.add_memory(user_input, reply_text, memory_type)
+
+    def _remember(self, user_input, reply_text, memory_type):
+        if not self.is_ready("memory"):
+            queued = memory_type != "skip"
+            if queued:
+                # Jangan dibuang: ditahan sampai memory siap (_drain_pending_memories)
+                print(f"{Fore.LIGHTBLACK_EX}[MEMORY] Not ready yet, buffered ({memory_type}).{Style.RESET_ALL}")
+                self.pending_memories.append((user_input, reply_text, memory_type))
+            if memory_type == "preference":
+                # Slot preference langsung dipakai command turn berikutnya
+                self.preferences.record(user_input, f"User: {user_input} | Kevin: {reply_text}")
+        else:
+            # Write-behind: cuma antre, embed + insert batch di background
+            queued = self.memory_db.add_memory(user_input, reply_text, memory_type)
+        # Fact/preference baru bisa mengubah jawaban personal yang topiknya mirip (preference juga
+        # keputusan command) -> jawaban lama itu jangan dipakai lagi. Memory 'conversation' tidak
+        # ikut di-recall, jadi tidak perlu; jawaban dari cache juga tidak membawa info baru.
+        if queued and memory_type in ("fact", "preference") and not self.reply_from_cache:
+            if memory_type == "preference":
+                self.response_cache.invalidate("command")
+            # Embed prompt untuk cek kemiripan -> jangan di event loop
+            asyncio.get_running_loop().run_in_executor(None, self.response_cache.invalidate_related, user_input)
+
+    def _capture(self, timeout, phrase_limit, start_pos=None, on_onset=None, on_wake=None):
+        """
+        Blocking capture (dipanggil lewat executor, bukan di event loop).
+        Baca dari ring buffer mic persistent, jadi tidak ada open/close device.
+        Return (samples, wav_bytes) atau None kalau timeout / hening.
+        Saat idle, wake word dicek lokal dulu; kalau tidak ada -> tidak ada STT.
+        on_wake() dipanggil begitu wake word lolos, sebelum encode / STT.
+        """
+        samples = self.mic.capture_utterance(timeout=timeout, phrase_limit=phrase_limit, start_pos=start_pos, on_onset=on_onset)
+        if samples is None: return None
+        # Endpointing: frame speech terakhir -> capture selesai (pause VAD), sebelum cek wake word / encode
+        now = time.perf_counter()
+        self.tracer.mark("last_voiced", at=now - (self.mic.trailing_silence() or 0.0))
+        self.tracer.mark("capture_end", at=now)
+        self.last_utterance = samples
+        if self._is_idle():
+            if not self.wake_spotter.detect(samples):
+                return None
+            if on_wake:
+                on_wake()
+        # Buffer WAV langsung di memory, tanpa round trip ke disk
+        return samples, encode_wav(samples, self.mic.rate)
+
+    def _is_idle(self):
+        return not (self.is_session_active or self.awaiting_confirmation or self.awaiting_clarification)
+
+    def _train_wake_spotter(self, transcript):
+        """
+        Self-enrollment dari hasil STT saat idle: utterance yang isinya cuma "kevin"
+        jadi template, utterance tanpa "kevin" jadi sampel negatif (kalibrasi FAR).
+        Audio yang lolos cuma untuk verifikasi tapi ternyata berisi "kevin" = miss.
+        Jalan di executor supaya DTW kalibrasi tidak menahan event loop.
+        """
+        samples = self.last_utterance
+        if samples is None: return
+        loop = asyncio.get_running_loop()
+        words = re.findall(r"\w+", transcript.lower())
+        if self.wake_spotter.last_verify and WAKE_WORD in words:
+            loop.run_in_executor(None, self.wake_spotter.add_miss, self.wake_spotter.last_score)
+        if words == [WAKE_WORD]:
+            if self.wake_spotter.wants_templates:
+                loop.run_in_executor(None, self.wake_spotter.enroll, samples)
+        elif WAKE_WORD not in words:
+            loop.run_in_executor(None, self.wake_spotter.add_negative, samples)
+
+    async def alisten(self, timeout=5, phrase_limit=5):
+        """
+        Async capture + transcribe. Mic capture jalan di thread executor,
+        Whisper lewat AsyncGroq, jadi event loop (think/TTS) tetap jalan.
+        """
+        if self.awaiting_confirmation:
+            print(f"{Fore.YELLOW}[CONFIRM?] Waiting for YES/NO...{Style.RESET_ALL}", end="\r")
+        elif self.awaiting_clarification:
+             print(f"{Fore.YELLOW}[CLARIFY] Waiting for detail...{Style.RESET_ALL}", end="\r")
+        elif self.is_session_active:
+            print(f"{Fore.GREEN}[LISTENING]...{Style.RESET_ALL}", end="\r")
+        else:
+            print(f"{Fore.BLACK}{Style.BRIGHT}[IDLE] Waiting...   {Style.RESET_ALL}", end="\r")
+
+        # Kalau barusan ada barge-in, mulai capture dari onset interupsi itu
+        start_pos = self.barge_in.consume()
+        loop = asyncio.get_running_loop()
+        def on_onset(pos):
+            # Dipanggil dari thread capture
+            self.tracer.mark("speech_onset")
+            loop.call_soon_threadsafe(self.speculator.on_onset, pos)
+        def on_wake():
+            # Idle -> bangun: pool mungkin sudah dingin (keep-alive cuma jalan selama sesi aktif)
+            loop.call_soon_threadsafe(self.speculator.on_wake)
+        try:
+            with self.tracer.span("capture", timeout=timeout):
+                captured = await asyncio.to_thread(self._capture, timeout, phrase_limit, start_pos, on_onset, on_wake)
+            if not captured:
+                self.speculator.discard()
+                return None
+            self.speculator.captured()
+            _, wav_bytes = captured
+            with self.tracer.span("stt", upload_bytes=len(wav_bytes)):
+                text = await self._transcribe(wav_bytes)
+            if text:
+                print(f"{Fore.LIGHTBLACK_EX}> Input: {text}{Style.RESET_ALL}")
+                self.tracer.annotate(input=text)
+            return text
+        except Exception: return None
+
+    async def _transcribe(self, wav_bytes, hedge=True):
+        request = lambda: self.client_whisper.audio.transcriptions.create(
+            file=(STT_UPLOAD_NAME, wav_bytes),
+            model="whisper-large-v3",
+            response_format="text", language="id" 
+        )
+        # Transkrip parsial (spekulatif) tidak di-hedge, biar jatah hedge untuk yang final
+        transcription = await (self.hedge_stt.run(request) if hedge else request())
+        self.speculator.touch()
+        return transcription.strip()
+
+    async def _transcribe_partial(self, samples):
+        try:
+            return await self._transcribe(encode_wav(samples, self.mic.rate), hedge=False)
+        except Exception:
+            return ""
+
+    async def _warm_connections(self):
+        # Request ringan supaya DNS + TLS sudah siap saat STT/LLM sungguhan dikirim (pool dipakai bersama)
+        await self.client_chat.models.list()
+        self.speculator.touch()
+
+    async def _ping(self):
+        await self._warm_connections()
 
     async def speak(self, text, important=False):
         if not text: return
@@ -139,52 +357,101 @@ class KevinAgent:
                 return
 
         print(f"{Fore.BLUE}[KEVIN] {text}{Style.RESET_ALL}")
+        sentences = [sentence for sentence in re.split(r'(?<=[.!?])\s+', text) if sentence.strip()]
+        await self._play_sentences(self._iter_list(sentences), important)
+
+    async def speak_stream(self, sentence_queue, important=False):
+        """
+        Ucapkan kalimat satu per satu begitu datang dari think() streaming.
+        Queue diakhiri None. Tidak kena throttle (ini reply utama, bukan filler).
+        Return jumlah kalimat yang diterima.
+        """
+        self.stream_sentence_count = 0
+        async def _drain():
+            while True:
+                sentence = await sentence_queue.get()
+                if sentence is None: return
+                self.stream_sentence_count += 1
+                print(f"{Fore.BLUE}[KEVIN] {sentence}{Style.RESET_ALL}")
+                yield sentence
+        await self._play_sentences(_drain(), important)
+        return self.stream_sentence_count
+
+    @staticmethod
+    async def _iter_list(items):
+        for item in items:
+            yield item
+
+    async def _play_sentences(self, sentences, important=False):
+        """
+        Producer/consumer TTS: kalimat berikutnya disintesis (look-ahead terbatas)
+        selagi kalimat sekarang diputar. Barge-in langsung cancel sintesis yang antre.
+        """
         t_speak_start = time.perf_counter()
+        # Trigger dari ucapan sebelumnya jangan men-skip ucapan ini (posisi onset tetap untuk capture)
+        self.barge_in.reset()
+        speak_span = self.tracer.start_span("speak")
+        pipeline = SynthesisPipeline(sentences, should_stop=lambda: self.barge_in.triggered and not important, cache=self.tts_cache, connector=self.tts_connector).start()
         
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        for sentence in sentences:
-            if not sentence.strip(): continue
-            if await self._check_barge_in(): 
-                print(f"{Fore.MAGENTA}[BARGE-IN] Speech skipped.{Style.RESET_ALL}")
-                break 
-
-            unique_filename = f"tts_{uuid.uuid4().hex}.mp3"
-            try:
-                communicate = edge_tts.Communicate(sentence, "en-US-ChristopherNeural", rate="+10%")
-                await communicate.save(unique_filename)
-                pygame.mixer.music.load(unique_filename)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    if await self._check_barge_in(): 
-                        pygame.mixer.music.stop()
-                        return 
-                    await asyncio.sleep(0.1)
-                await asyncio.sleep(0.2) 
-            except Exception as e:
-                print(f"{Fore.RED}[TTS ERROR] {e}{Style.RESET_ALL}")
-            finally:
-                try:
-                    pygame.mixer.music.unload()
-                    if os.path.exists(unique_filename): os.remove(unique_filename)
-                except: pass
+        try:
+            while True:
+                item = await pipeline.next()
+                if item is None: break
+                if self.barge_in.triggered and not important: 
+                    print(f"{Fore.MAGENTA}[BARGE-IN] Speech skipped.{Style.RESET_ALL}")
+                    item.cancel()
+                    break 
+
+                async with self.speech_lock:
+                    # Decode + play mulai dari chunk pertama, tanpa file sementara
+                    sentence_span = self.tracer.start_span("playback", parent="speak", chars=len(item.text))
+                    playback = asyncio.get_running_loop().run_in_executor(None, item.play_blocking, self.speaker)
+                    if self._barge_in_allowed(): self.barge_in.arm()
+                    try:
+                        while not playback.done() or self.speaker.busy:
+                            if self._check_barge_in(): 
+                                item.cancel()
+                                return 
+                            await asyncio.sleep(0.02)
+                        await playback
+                        report_tts_error(item)
+                        await asyncio.sleep(0.2) 
+                    except Exception as e:
+                        print(f"{Fore.RED}[TTS ERROR] {e}{Style.RESET_ALL}")
+                    finally:
+                        self.barge_in.disarm()
+                        self._trace_playback(item, sentence_span)
+        finally:
+            pipeline.cancel()
+            speak_span.end()
         
         self.last_speech_end_time = time.time()
         dur_speak = time.perf_counter() - t_speak_start
         if dur_speak > 0.1:
             print(f"{Fore.LIGHTBLACK_EX}[PERF] Speak: {dur_speak:.2f}s{Style.RESET_ALL}")
 
-    async def _check_barge_in(self):
+    def _trace_playback(self, item, span):
+        """Mark TTS first byte / playback start (kejadian pertama per turn) & playback end (terakhir)."""
+        if item.first_byte_time: self.tracer.mark("tts_first_byte", at=item.first_byte_time)
+        if item.first_pcm_time: self.tracer.mark("playback_start", at=item.first_pcm_time)
+        self.tracer.mark("playback_end", overwrite=True)
+        span.end(cached=item.pcm is not None)
+
+    def _barge_in_allowed(self):
         if self.awaiting_confirmation or self.awaiting_clarification: return False 
         if time.time() - self.last_barge_in_time < 1.5: return False
-        try:
-            interruption = self.listen(timeout=0.1, phrase_limit=2) 
-            if interruption and WAKE_WORD in interruption.lower():
-                print(f"\n{Fore.RED}[INTERRUPTED]{Style.RESET_ALL}")
-                self.last_interaction_time = time.time()
-                self.last_barge_in_time = time.time()
-                return True
-        except: pass
-        return False
+        return True
+
+    def _check_barge_in(self):
+        """
+        Cek hasil BargeInMonitor (VAD lokal, tanpa STT). Mixer sudah di-stop oleh
+        monitor; audio interupsi baru dikirim ke Whisper di alisten() berikutnya.
+        """
+        if not self.barge_in.triggered: return False
+        print(f"\n{Fore.RED}[INTERRUPTED]{Style.RESET_ALL}")
+        self.last_interaction_time = time.time()
+        self.last_barge_in_time = time.time()
+        return True
 
     def _detect_intent(self, text):
         text_clean = text.lower().strip(" .,!?")
@@ -203,51 +470,168 @@ class KevinAgent:
         if any(token in text_lower for token in ambiguous_tokens): return True
         return False
 
-    async def think(self, user_text, intent_override=None):
+    async def think(self, user_text, intent_override=None, sentence_queue=None):
+        """
+        Panggil LLM. Kalau sentence_queue diberikan, pakai mode streaming: field "reply"
+        di-parse incremental dan tiap kalimat lengkap langsung dimasukkan ke queue
+        (diakhiri None) supaya TTS bisa mulai sebelum JSON selesai.
+        """
         intent_data = intent_override if intent_override else self._detect_intent(user_text)
         intent_type = intent_data["type"]
         
-        current_window = get_active_window()
+        # Window context & memory recall jalan paralel; recall dibatasi deadline per turn.
+        # Kalau speculator sudah mulai dari onset (dan teks final cocok), hasilnya dipakai.
+        speculative_recall = self.speculator.take_recall(user_text) if intent_type == "conversation" else None
+        recall_task = speculative_recall or asyncio.create_task(self._recall(user_text, intent_type))
+        current_window = self.speculator.take_window()
+        if current_window is None:
+            with self.tracer.span("window"):
+                current_window = await asyncio.to_thread(get_active_window)
+        with self.tracer.span("response_cache") as cache_span:
+            cached = await asyncio.to_thread(self.response_cache.lookup, user_text, intent_type, current_window)
+            cache_span.end(hit=bool(cached))
+        self.reply_from_cache = bool(cached)
+        if cached:
+            recall_task.cancel()
+            if sentence_queue is not None:
+                self._replay_reply(cached, sentence_queue)
+            return cached, intent_type
+        with self.tracer.span("recall", intent=intent_type, speculative=speculative_recall is not None):
+            past_memories = await recall_task
         
-        # [EPIC 4 REFINED] MEMORY RECALL GATE
-        # Filter ketat untuk mencegah "Narrative Pollution"
-        past_memories = ""
+        # Prefix statis yang sudah di-minify + context/memory yang dipotong sesuai budget
+        with self.tracer.span("prompt") as prompt_span:
+            messages, token_report = self.prompt_builder.build(intent_type, current_window, past_memories, user_text)
+            prompt_span.end(tokens=token_report["total"])
+        temperature = 0.1 if intent_type == "command" else 0.6
+        print(f"{Fore.LIGHTBLACK_EX}[PROMPT] {intent_type}: ~{token_report['total']} tok "
+              f"(prefix {token_report['prefix']}, ctx {token_report['context']}, mem {token_report['memory']}, user {token_report['user']}){Style.RESET_ALL}")
         
-        if intent_type == "command":
-            # Command -> Cuma butuh Preference (bias decision)
-            past_memories = self.memory_db.retrieve_memory(user_text, n_results=1, memory_type_filter="preference")
-        else:
-            # Conversation -> Butuh Fact & Preference. 
-            # EXCLUDE 'conversation' lama agar tidak halusinasi topik.
-            past_memories = self.memory_db.retrieve_memory(user_text, n_results=2, memory_type_filter=["fact", "preference"])
-        
-        context_str = f"\n\n[CONTEXT]\nActive Window: '{current_window}'"
-        if past_memories: context_str += f"\n[RELEVANT MEMORY (Use Silently)]: {past_memories}"
-
-        if intent_type == "command":
-            system_instruction = self.PROMPT_MODE_COMMAND + self.PROMPT_CORE
-            temperature = 0.1 
+        self.tracer.mark("llm_start")
+        llm_span = self.tracer.start_span("llm", stream=sentence_queue is not None)
+        if sentence_queue is not None:
+            response = await self._think_stream(messages, temperature, sentence_queue)
+            llm_span.end()
         else:
-            system_instruction = self.PROMPT_MODE_CONVERSATION + self.PROMPT_CORE
-            temperature = 0.6 
-
-        messages = [
-            {"role": "system", "content": system_instruction + context_str},
-            {"role": "user", "content": user_text}
-        ]
-        
+            try:
+                completion = await self.hedge_llm.run(lambda: self.client_chat.chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=messages,
+                    temperature=temperature, 
+                    max_tokens=150, 
+                    response_format={"type": "json_object"}
+                ))
+                response = completion.choices[0].message.content
+                # Non-streaming: token pertama & terakhir datang bersamaan
+                self.tracer.mark("llm_first_token")
+                self.tracer.mark("llm_last_token")
+                llm_span.end()
+                self.speculator.touch()
+                self._report_usage(completion.usage)
+            except Exception as e: 
+                print(f"{Fore.RED}[THINK ERROR] {e}{Style.RESET_ALL}")
+                llm_span.end(error=type(e).__name__)
+                return "{}", intent_type
+        await asyncio.to_thread(self.response_cache.store, user_text, intent_type, current_window, response)
+        return response, intent_type
+
+    @staticmethod
+    def _report_usage(usage):
+        """Token prompt versi provider (termasuk yang kena prompt cache, kalau dilaporkan)."""
+        if not usage: return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details else None
+        cached_str = f", cached {cached}" if cached is not None else ""
+        print(f"{Fore.LIGHTBLACK_EX}[PROMPT] Provider tokens: prompt {usage.prompt_tokens}{cached_str}, completion {usage.completion_tokens}{Style.RESET_ALL}")
+
+    @staticmethod
+    def _replay_reply(response_json_str, sentence_queue):
+        """Cache hit di mode streaming: reply yang di-cache dimasukkan ke queue per kalimat."""
+        chunker = SentenceChunker()
+        reply = json.loads(response_json_str).get("reply", "")
+        for sentence in chunker.feed(reply) + chunker.flush():
+            sentence_queue.put_nowait(sentence)
+        sentence_queue.put_nowait(None)
+
+    async def _open_stream(self, messages, temperature):
+        """Buka stream LLM dan tunggu chunk pertama (yang di-hedge adalah time-to-first-chunk)."""
+        stream = await self.client_chat.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=messages,
+            temperature=temperature, 
+            max_tokens=150, 
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        chunks = stream.__aiter__()
         try:
-            completion = await self.client_chat.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=messages,
-                temperature=temperature, 
-                max_tokens=150, 
-                response_format={"type": "json_object"}
+            first = await chunks.__anext__()
+        except BaseException:
+            await self._close_stream((stream, chunks, None))
+            raise
+        return stream, chunks, first
+
+    @staticmethod
+    async def _close_stream(opened):
+        try:
+            await opened[0].close()
+        except Exception:
+            pass
+
+    async def _iter_stream(self, opened):
+        _, chunks, first = opened
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    async def _think_stream(self, messages, temperature, sentence_queue):
+        parser = IncrementalReplyParser()
+        chunker = SentenceChunker()
+        content = []
+        try:
+            opened = await self.hedge_llm.run(
+                lambda: self._open_stream(messages, temperature),
+                on_cancel=lambda loser: asyncio.create_task(self._close_stream(loser)),
             )
-            return completion.choices[0].message.content, intent_type
+            async for chunk in self._iter_stream(opened):
+                # Groq kirim usage di chunk terakhir (x_groq.usage)
+                self._report_usage(getattr(getattr(chunk, "x_groq", None), "usage", None))
+                if not chunk.choices: continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta: self.tracer.mark("llm_first_token")
+                content.append(delta)
+                for sentence in chunker.feed(parser.feed(delta)):
+                    sentence_queue.put_nowait(sentence)
+            for sentence in chunker.flush():
+                sentence_queue.put_nowait(sentence)
+            self.tracer.mark("llm_last_token")
+            self.speculator.touch()
+            return "".join(content)
         except Exception as e: 
             print(f"{Fore.RED}[THINK ERROR] {e}{Style.RESET_ALL}")
-            return "{}", intent_type
+            return "".join(content) or "{}"
+        finally:
+            sentence_queue.put_nowait(None)
+
+    async def _recall(self, user_text, intent_type):
+        # [EPIC 4 REFINED] MEMORY RECALL GATE
+        # Filter ketat untuk mencegah "Narrative Pollution"
+        if intent_type == "command":
+            # Command -> Cuma butuh Preference (bias decision): lookup slot O(1), tanpa embedding
+            return self.preferences.lookup(user_text)
+        if not self.is_ready("memory"):
+            # Degrade: memory masih warming up, jawab tanpa recall
+            print(f"{Fore.LIGHTBLACK_EX}[MEMORY] Warming up, recall skipped.{Style.RESET_ALL}")
+            return ""
+        # Conversation -> Butuh Fact & Preference. 
+        # EXCLUDE 'conversation' lama agar tidak halusinasi topik.
+        recall = self.memory_db.aretrieve_memory(user_text, n_results=2, memory_type_filter=["fact", "preference"], deadline=RECALL_DEADLINE)
+        try:
+            return await asyncio.wait_for(recall, timeout=RECALL_DEADLINE)
+        except asyncio.TimeoutError:
+            # Recall lambat jangan menahan LLM; turn ini jalan tanpa memory
+            print(f"{Fore.YELLOW}[MEMORY] Recall > {RECALL_DEADLINE}s, skipped for this turn.{Style.RESET_ALL}")
+            return ""
 
     async def handle_confirmation(self, user_input):
         positive_keywords = ["yes", "ya", "sure", "do it", "confirm", "okay"]
@@ -255,7 +639,8 @@ class KevinAgent:
         user_input = user_input.lower()
         if any(word in user_input for word in positive_keywords):
             await self.speak("Confirmed.", important=True)
-            self.skills.execute(self.pending_data) 
+            with self.tracer.span("skill", action=self.pending_data.get("action"), confirmed=True):
+                self.skills.execute(self.pending_data) 
             self.awaiting_confirmation = False
             self.pending_data = None
             return True
@@ -269,10 +654,13 @@ class KevinAgent:
 
     async def run(self):
         print(f"{Style.BRIGHT}{Fore.GREEN}=== KEVIN ONLINE V6.2 (EPIC 4 REFINED) ==={Style.RESET_ALL}")
+        await self.start()
         await self.speak("System initialized.")
         
         try:
             while True:
+                # Turn sebelumnya (kalau ada transkripnya) diekspor di sini
+                self.tracer.begin_turn()
                 t_listen_start = time.perf_counter()
                 is_repair_turn = False 
 
@@ -290,7 +678,7 @@ class KevinAgent:
                     continue
 
                 listen_timeout = 5 if (self.awaiting_confirmation or self.awaiting_clarification) else (8 if self.is_session_active else 2)
-                raw_input = self.listen(timeout=listen_timeout, phrase_limit=8)
+                raw_input = await self.alisten(timeout=listen_timeout, phrase_limit=8)
                 
                 if raw_input:
                     dur_listen = time.perf_counter() - t_listen_start
@@ -302,6 +690,7 @@ class KevinAgent:
 
                 raw_lower = raw_input.lower()
                 final_prompt = ""
+                if self._is_idle(): self._train_wake_spotter(raw_input)
                 
                 if "reset" in raw_lower and "kevin" in raw_lower:
                     print(f"{Fore.RED}[SYSTEM] MANUAL RESET TRIGGERED{Style.RESET_ALL}")
@@ -348,6 +737,7 @@ class KevinAgent:
                     t_think_start = time.perf_counter() 
                     
                     intent_data = self._detect_intent(final_prompt)
+                    self.tracer.annotate(intent=intent_data["type"], repair=is_repair_turn)
                     
                     if self._check_ambiguity(final_prompt, intent_data["type"]):
                         print(f"{Fore.YELLOW}[AMBIGUITY GATE] Detected ambiguous token.{Style.RESET_ALL}")
@@ -356,22 +746,37 @@ class KevinAgent:
                         self.clarification_context = final_prompt
                         continue
 
-                    think_task = asyncio.create_task(self.think(final_prompt, intent_override=intent_data))
+                    # Fast path lokal: command jelas langsung jadi action dict, tanpa ack & tanpa LLM
+                    with self.tracer.span("route") as route_span:
+                        routed = await asyncio.to_thread(self.router.route, final_prompt)
+                        route_span.end(routed=bool(routed))
+                    if routed:
+                        print(f"{Fore.GREEN}[ROUTER] Local route: {routed['action']} (conf {routed['confidence']}){Style.RESET_ALL}")
+                        response_json_str, intent_type, reply_streamed = json.dumps(routed), "command", False
+                    else:
+                        # Conversation: streaming reply -> TTS per kalimat (command biasanya skip speech)
+                        sentence_queue = asyncio.Queue() if intent_data["type"] == "conversation" else None
+                        think_task = asyncio.create_task(self.think(final_prompt, intent_override=intent_data, sentence_queue=sentence_queue))
                     
-                    if not self.awaiting_confirmation and not is_repair_turn:
-                        ack = random.choice(ACKS_COMMAND if intent_data["type"] == "command" else ACKS_CONVERSATION)
-                        print(f"{Fore.CYAN}[ACK] {ack}{Style.RESET_ALL}")
-                        await self.speak(ack)
-
-                    try:
-                        response_json_str, intent_type = await asyncio.wait_for(asyncio.shield(think_task), timeout=5)
-                    except asyncio.TimeoutError:
-                        print(f"{Fore.YELLOW}[SLOW LLM] Timeout reached. Notifying user...{Style.RESET_ALL}")
-                        await self.speak("Still thinking...", important=True)
-                        response_json_str, intent_type = await think_task
+                        if not self.awaiting_confirmation and not is_repair_turn:
+                            ack = random.choice(ACKS_COMMAND if intent_data["type"] == "command" else ACKS_CONVERSATION)
+                            print(f"{Fore.CYAN}[ACK] {ack}{Style.RESET_ALL}")
+                            await self.speak(ack)
+
+                        speak_task = asyncio.create_task(self.speak_stream(sentence_queue)) if sentence_queue else None
+
+                        try:
+                            response_json_str, intent_type = await asyncio.wait_for(asyncio.shield(think_task), timeout=5)
+                        except asyncio.TimeoutError:
+                            if not (speak_task and self.stream_sentence_count):
+                                print(f"{Fore.YELLOW}[SLOW LLM] Timeout reached. Notifying user...{Style.RESET_ALL}")
+                                await self.speak("Still thinking...", important=True)
+                            response_json_str, intent_type = await think_task
                     
-                    dur_think = time.perf_counter() - t_think_start
-                    print(f"{Fore.LIGHTBLACK_EX}[PERF] Think: {dur_think:.2f}s{Style.RESET_ALL}")
+                        dur_think = time.perf_counter() - t_think_start
+                        print(f"{Fore.LIGHTBLACK_EX}[PERF] Think: {dur_think:.2f}s{Style.RESET_ALL}")
+                        # Reply yang sudah di-stream ke TTS jangan diucapkan dua kali
+                        reply_streamed = bool(await speak_task) if speak_task else False
 
                     try:
                         data = json.loads(response_json_str)
@@ -383,7 +788,7 @@ class KevinAgent:
 
                         if confidence < 0.6 and not requires_confirmation:
                             print(f"{Fore.YELLOW}[LOW CONFIDENCE] Clarify...{Style.RESET_ALL}")
-                            await self.speak(reply_text, important=True)
+                            if not reply_streamed: await self.speak(reply_text, important=True)
                             self.awaiting_clarification = True
                             self.clarification_context = final_prompt
                             continue
@@ -393,13 +798,13 @@ class KevinAgent:
 
                         if should_skip_speech:
                             print(f"{Fore.MAGENTA}[SKIP SPEECH] Obvious action.{Style.RESET_ALL}")
-                        else:
+                        elif not reply_streamed:
                             await self.speak(reply_text)
 
                         if action == "none":
                             # [EPIC 4] Simpan conversation ke memory (bisa fact/conv)
                             if intent_type == "conversation":
-                                self.memory_db.add_memory(final_prompt, reply_text, memory_type)
+                                self._remember(final_prompt, reply_text, memory_type)
                         
                         elif requires_confirmation:
                             print(f"{Fore.YELLOW}[SAFETY] Confirming...{Style.RESET_ALL}")
@@ -407,12 +812,13 @@ class KevinAgent:
                             self.awaiting_confirmation = True
                             self.pending_data = data
                         else:
-                            self.skills.execute(data)
+                            with self.tracer.span("skill", action=action):
+                                self.skills.execute(data)
                             # [EPIC 4] Hanya simpan memory command jika itu preference
                             if memory_type == "preference":
-                                self.memory_db.add_memory(final_prompt, reply_text, memory_type)
+                                self._remember(final_prompt, reply_text, memory_type)
                             elif intent_type == "conversation":
-                                self.memory_db.add_memory(final_prompt, reply_text, memory_type)
+                                self._remember(final_prompt, reply_text, memory_type)
                         
                     except Exception as e:
                         print(f"{Fore.RED}[ERROR] {e}{Style.RESET_ALL}")
@@ -420,7 +826,24 @@ class KevinAgent:
 
         except KeyboardInterrupt:
             print(f"\n{Fore.RED}System Offline.{Style.RESET_ALL}")
-            if os.path.exists(TEMP_INPUT_FILE): os.remove(TEMP_INPUT_FILE)
+        finally:
+            self.mic.close()
+            self.speaker.close()
+            print(f"{Fore.LIGHTBLACK_EX}[ROUTER] Stats: {self.router.stats}{Style.RESET_ALL}")
+            print(f"{Fore.LIGHTBLACK_EX}[RESPONSE CACHE] Stats: {self.response_cache.stats}{Style.RESET_ALL}")
+            print(f"{Fore.LIGHTBLACK_EX}[SPECULATE] Stats: {self.speculator.stats}{Style.RESET_ALL}")
+            print(f"{Fore.LIGHTBLACK_EX}[HEDGE] STT: {self.hedge_stt.stats()} | LLM: {self.hedge_llm.stats()}{Style.RESET_ALL}")
+            print(f"{Fore.LIGHTBLACK_EX}[HTTP] Pool: {self.http_pool.reuse_info()}{Style.RESET_ALL}")
+            self.tracer.end_turn()
+            self.tracer.print_summary()
+            if self.keepalive_task: self.keepalive_task.cancel()
+            await self.http_pool.aclose()
+            if self.tts_connector: await self.tts_connector.shutdown()
+            self.preferences.flush()
+            # Flush memory yang masih antre (Ctrl+C tidak boleh menghilangkan memory)
+            if self.is_ready("memory"):
+                print(f"{Fore.LIGHTBLACK_EX}[MEMORY] Cache: {self.memory_db.cache_info()}{Style.RESET_ALL}")
+                self.memory_db.close()
 
 if __name__ == "__main__":
     kevin = KevinAgent()
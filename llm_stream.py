@@ -0,0 +1,86 @@
+import re
+
+_REPLY_KEY = re.compile(r'"reply"\s*:\s*"')
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+class IncrementalReplyParser:
+    """
+    Parser JSON incremental yang cuma peduli field "reply".
+    feed(chunk) mengembalikan potongan teks reply baru yang sudah ter-decode,
+    jadi TTS bisa mulai sebelum field lain (action, confidence, ...) selesai streaming.
+    """
+    def __init__(self):
+        self._buf = ""
+        self._pos = None      # Posisi karakter berikutnya di dalam string reply
+        self.done = False
+        self.reply = ""
+
+    def feed(self, chunk):
+        if self.done or not chunk:
+            return ""
+        self._buf += chunk
+        if self._pos is None:
+            match = _REPLY_KEY.search(self._buf)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        buf, i = self._buf, self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch == "\\":
+                if i + 1 >= len(buf):
+                    break  # Escape kepotong di batas chunk, tunggu chunk berikutnya
+                esc = buf[i + 1]
+                if esc == "u":
+                    if i + 6 > len(buf):
+                        break
+                    code = int(buf[i + 2:i + 6], 16)
+                    if 0xD800 <= code <= 0xDBFF:
+                        # High surrogate (emoji dll): gabung dengan \uDCxx berikutnya
+                        pair = buf[i + 6:i + 12]
+                        if len(pair) < 6 and "\\u".startswith(pair[:2]):
+                            break  # Pasangannya belum (lengkap) datang
+                        low = int(pair[2:], 16) if pair.startswith("\\u") else None
+                        if low is not None and 0xDC00 <= low <= 0xDFFF:
+                            out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                            i += 12
+                            continue
+                        code = 0xFFFD  # Surrogate tanpa pasangan tidak bisa di-encode (print / edge-tts)
+                    elif 0xDC00 <= code <= 0xDFFF:
+                        code = 0xFFFD
+                    out.append(chr(code))
+                    i += 6
+                else:
+                    out.append(_ESCAPES.get(esc, esc))
+                    i += 2
+                continue
+            out.append(ch)
+            i += 1
+        self._pos = i
+        text = "".join(out)
+        self.reply += text
+        return text
+
+
+class SentenceChunker:
+    """Kumpulkan teks streaming, keluarkan per kalimat lengkap (untuk TTS per kalimat)."""
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text):
+        self._pending += text
+        parts = _SENTENCE_END.split(self._pending)
+        self._pending = parts.pop()
+        return [p.strip() for p in parts if p.strip()]
+
+    def flush(self):
+        rest, self._pending = self._pending.strip(), ""
+        return [rest] if rest else []
@@ -0,0 +1,321 @@
+import json
+import os
+import threading
+import numpy as np
+
+COLLECTION_NAME = "user_interactions"
+INDEX_PATH = "kevin_memory_index"
+MEMORY_TYPES = ("fact", "preference", "conversation")
+INITIAL_CAPACITY = 1024
+
+
+class ChromaBackend:
+    """
+    Backend lama: chromadb.PersistentClient. Embedding selalu dihitung di luar
+    (embedding_function=None), jadi backend ini cuma simpan + cari.
+    """
+    def __init__(self, path, collection_name=COLLECTION_NAME):
+        import chromadb  # Import berat, hanya kalau backend ini dipakai
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(name=collection_name, embedding_function=None)
+
+    def count(self):
+        return self.collection.count()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def query(self, embedding, n_results, types=None):
+        where = None
+        if types:
+            where = {"type": {"$in": list(types)}} if len(types) > 1 else {"type": types[0]}
+        results = self.collection.query(query_embeddings=[embedding], n_results=n_results, where=where)
+        if not results or not results["documents"]:
+            return {"ids": [], "documents": []}
+        return {"ids": results["ids"][0], "documents": results["documents"][0]}
+
+    def get(self, ids=None, memory_type=None, include_embeddings=False):
+        include = ["metadatas", "documents"] + (["embeddings"] if include_embeddings else [])
+        got = self.collection.get(ids=ids, where={"type": memory_type} if memory_type else None, include=include)
+        return {
+            "ids": got["ids"],
+            "documents": got["documents"],
+            "metadatas": got["metadatas"],
+            "embeddings": np.asarray(got["embeddings"], dtype=np.float32) if include_embeddings else None,
+        }
+
+    def update_metadata(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+
+    def close(self):
+        pass
+
+
+class NumpyBackend:
+    """
+    Index in-process: embedding di matrix float32 contiguous (memmap dari disk),
+    metadata di array kolom (type code, timestamp, last_recalled, merged_count).
+    Query = satu dot product vectorized + mask type + argpartition top-k.
+    Baris yang dihapus cuma ditandai (alive=False) dan dipadatkan kalau sudah banyak.
+    Dokumen disimpan sebagai log JSONL append-only (cuma baris yang berubah per batch);
+    touch metadata (update_metadata) cuma menandai dirty, disimpan bareng batch berikutnya / close().
+    """
+    def __init__(self, path=INDEX_PATH, dim=None):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._col_path = os.path.join(path, "columns.npz")
+        self._doc_path = os.path.join(path, "documents.jsonl")
+        self._legacy_doc_path = os.path.join(path, "documents.json")
+        self._load()
+
+    # --- storage ---
+    def _load(self):
+        self.size = 0
+        self.vectors = None
+        self.ids = []
+        self.documents = []
+        self.raw_inputs = []
+        self.type_codes = np.zeros(0, dtype=np.uint8)
+        self.timestamps = np.zeros(0, dtype=np.float64)
+        self.last_recalled = np.zeros(0, dtype=np.float64)
+        self.merged_count = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.types = list(MEMORY_TYPES)
+        self._index = {}
+        self._doc_pending = set()   # Baris yang dokumen/raw_input-nya belum masuk log
+        self._doc_records = 0       # Jumlah record di log (termasuk versi lama yang sudah ditimpa)
+        self._dirty = False
+        if not os.path.exists(self._col_path):
+            return
+        with np.load(self._col_path) as cols:
+            self.dim = int(cols["dim"])
+            self.size = int(cols["size"])
+            self.types = [str(t) for t in cols["types"]]
+            self.type_codes = cols["type_codes"]
+            self.timestamps = cols["timestamps"]
+            self.last_recalled = cols["last_recalled"]
+            self.merged_count = cols["merged_count"]
+            self.alive = cols["alive"]
+        legacy = not os.path.exists(self._doc_path) and os.path.exists(self._legacy_doc_path)
+        if legacy:
+            with open(self._legacy_doc_path, encoding="utf-8") as f:
+                docs = json.load(f)
+            self.ids, self.documents, self.raw_inputs = docs["ids"], docs["documents"], docs["raw_inputs"]
+        else:
+            self._read_doc_log()
+        capacity = os.path.getsize(self._vec_path) // (4 * self.dim)
+        self.vectors = np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._index = {memory_id: row for row, memory_id in enumerate(self.ids) if self.alive[row]}
+        if legacy:
+            # Format lama (satu JSON utuh) -> log JSONL
+            self._save(rewrite_docs=True)
+            os.remove(self._legacy_doc_path)
+
+    def _read_doc_log(self):
+        """Replay log dokumen: record terakhir per baris menang; baris terakhir yang kepotong dilewati."""
+        self.ids, self.documents, self.raw_inputs = [""] * self.size, [""] * self.size, [""] * self.size
+        with open(self._doc_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._doc_records += 1
+                row = record["row"]
+                if row < self.size:
+                    self.ids[row], self.documents[row], self.raw_inputs[row] = record["id"], record["document"], record["raw_input"]
+
+    def _doc_record(self, row):
+        return json.dumps({"row": row, "id": self.ids[row], "document": self.documents[row],
+                           "raw_input": self.raw_inputs[row]}, ensure_ascii=False) + "\n"
+
+    def _ensure_capacity(self, rows):
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, capacity * 2, rows)
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+        with open(self._vec_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.vectors = np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+        grow = new_capacity - len(self.alive)
+        self.type_codes = np.concatenate((self.type_codes, np.zeros(grow, dtype=np.uint8)))
+        self.timestamps = np.concatenate((self.timestamps, np.zeros(grow)))
+        self.last_recalled = np.concatenate((self.last_recalled, np.zeros(grow)))
+        self.merged_count = np.concatenate((self.merged_count, np.zeros(grow, dtype=np.int32)))
+        self.alive = np.concatenate((self.alive, np.zeros(grow, dtype=bool)))
+
+    def _save(self, rewrite_docs=False):
+        """
+        Vektor di-flush (memmap), dokumen yang berubah di-append ke log (ditulis ulang atomik
+        kalau rewrite_docs / log sudah dua kali jumlah baris), lalu kolom ditulis atomik
+        (tmp + replace) paling akhir: size di kolom yang menentukan baris mana yang sah.
+        """
+        if self.vectors is not None:
+            self.vectors.flush()
+        if rewrite_docs or self._doc_records > 2 * self.size + INITIAL_CAPACITY:
+            tmp = f"{self._doc_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(self._doc_record(row) for row in range(self.size))
+            os.replace(tmp, self._doc_path)
+            self._doc_records = self.size
+        elif self._doc_pending:
+            with open(self._doc_path, "a", encoding="utf-8") as f:
+                f.writelines(self._doc_record(row) for row in sorted(self._doc_pending))
+            self._doc_records += len(self._doc_pending)
+        self._doc_pending.clear()
+        tmp = f"{self._col_path}.tmp.npz"
+        np.savez(tmp, dim=self.dim or 0, size=self.size, types=np.array(self.types),
+                 type_codes=self.type_codes, timestamps=self.timestamps, last_recalled=self.last_recalled,
+                 merged_count=self.merged_count, alive=self.alive)
+        os.replace(tmp, self._col_path)
+        self._dirty = False
+
+    def _type_code(self, memory_type):
+        if memory_type not in self.types:
+            self.types.append(memory_type)
+        return self.types.index(memory_type)
+
+    def _metadata(self, row):
+        return {
+            "type": self.types[self.type_codes[row]],
+            "timestamp": float(self.timestamps[row]),
+            "last_recalled": float(self.last_recalled[row]),
+            "merged_count": int(self.merged_count[row]),
+            "raw_input": self.raw_inputs[row],
+        }
+
+    def _set_metadata(self, row, metadata):
+        self.type_codes[row] = self._type_code(metadata.get("type", "fact"))
+        self.timestamps[row] = metadata.get("timestamp", 0.0)
+        self.last_recalled[row] = metadata.get("last_recalled", metadata.get("timestamp", 0.0))
+        self.merged_count[row] = metadata.get("merged_count", 0)
+        self.raw_inputs[row] = metadata.get("raw_input", "")
+
+    def _compact_storage(self):
+        """Buang baris mati: tulis ulang matrix & kolom dalam urutan baris yang hidup."""
+        rows = np.nonzero(self.alive[:self.size])[0]
+        vectors = np.array(self.vectors[rows])
+        self.type_codes, self.timestamps = self.type_codes[rows], self.timestamps[rows]
+        self.last_recalled, self.merged_count = self.last_recalled[rows], self.merged_count[rows]
+        self.alive = np.ones(len(rows), dtype=bool)
+        self.ids = [self.ids[r] for r in rows]
+        self.documents = [self.documents[r] for r in rows]
+        self.raw_inputs = [self.raw_inputs[r] for r in rows]
+        self.size = len(rows)
+        del self.vectors
+        self.vectors = None
+        os.remove(self._vec_path)
+        self._ensure_capacity(max(1, self.size))
+        self.vectors[:self.size] = vectors
+        self._index = {memory_id: row for row, memory_id in enumerate(self.ids)}
+
+    # --- backend interface ---
+    def count(self):
+        return len(self._index)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+            self._ensure_capacity(self.size + len(ids))
+            for memory_id, vector, document, metadata in zip(ids, embeddings, documents, metadatas):
+                row = self._index.get(memory_id)
+                if row is None:
+                    row = self.size
+                    self.size += 1
+                    self.ids.append(memory_id)
+                    self.documents.append(document)
+                    self.raw_inputs.append("")
+                    self._index[memory_id] = row
+                self.vectors[row] = vector
+                self.documents[row] = document
+                self.alive[row] = True
+                self._set_metadata(row, metadata)
+                self._doc_pending.add(row)
+            self._save()
+
+    def query(self, embedding, n_results, types=None):
+        with self._lock:
+            if not self.count():
+                return {"ids": [], "documents": []}
+            scores = self.vectors[:self.size] @ np.asarray(embedding, dtype=np.float32)
+            mask = self.alive[:self.size].copy()
+            if types:
+                codes = [self.types.index(t) for t in types if t in self.types]
+                mask &= np.isin(self.type_codes[:self.size], codes)
+            candidates = np.nonzero(mask)[0]
+            if not len(candidates):
+                return {"ids": [], "documents": []}
+            k = min(n_results, len(candidates))
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return {"ids": [self.ids[r] for r in top], "documents": [self.documents[r] for r in top]}
+
+    def get(self, ids=None, memory_type=None, include_embeddings=False):
+        with self._lock:
+            if self.vectors is None:
+                rows = []
+            elif ids is not None:
+                rows = [self._index[i] for i in ids if i in self._index]
+            else:
+                mask = self.alive[:self.size].copy()
+                if memory_type:
+                    mask &= self.type_codes[:self.size] == (self.types.index(memory_type) if memory_type in self.types else -1)
+                rows = np.nonzero(mask)[0].tolist()
+            return {
+                "ids": [self.ids[r] for r in rows],
+                "documents": [self.documents[r] for r in rows],
+                "metadatas": [self._metadata(r) for r in rows],
+                "embeddings": np.array(self.vectors[rows]) if include_embeddings and rows else
+                              (np.zeros((0, self.dim or 0), dtype=np.float32) if include_embeddings else None),
+            }
+
+    def update_metadata(self, ids, metadatas):
+        """Touch LRU / merge count: cuma di memory, disimpan bareng write berikutnya atau close()."""
+        with self._lock:
+            for memory_id, metadata in zip(ids, metadatas):
+                row = self._index.get(memory_id)
+                if row is not None:
+                    raw_input = self.raw_inputs[row]
+                    self._set_metadata(row, metadata)
+                    if self.raw_inputs[row] != raw_input:
+                        self._doc_pending.add(row)
+                    self._dirty = True
+
+    def delete(self, ids):
+        with self._lock:
+            for memory_id in ids:
+                row = self._index.pop(memory_id, None)
+                if row is not None:
+                    self.alive[row] = False
+            # Padatkan kalau lebih dari separuh baris sudah mati
+            compacted = bool(self.size and len(self._index) < self.size // 2)
+            if compacted:
+                self._compact_storage()
+            self._save(rewrite_docs=compacted)
+
+    def close(self):
+        with self._lock:
+            if self._dirty or self._doc_pending:
+                self._save()
+            elif self.vectors is not None:
+                self.vectors.flush()
+
+
+BACKENDS = {"chroma": ChromaBackend, "numpy": NumpyBackend}
+
+
+def open_backend(name, path):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown memory backend '{name}' (choose: {', '.join(BACKENDS)})")
+    return BACKENDS[name](path)
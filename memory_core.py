@@ -1,65 +1,419 @@
-import chromadb
-import uuid
+import asyncio
+import atexit
+import hashlib
+import os
+import threading
+import numpy as np
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from colorama import Fore, Style
 
+from memory_backend import open_backend, INDEX_PATH
+
+MEMORY_DB_PATH = "kevin_memory_db"
+# "chroma" (default, data lama) atau "numpy" (index in-process, lihat migrate_memory.py)
+DEFAULT_BACKEND = "chroma"     # Override lewat env KEVIN_MEMORY_BACKEND (dibaca saat MemoryManager dibuat, setelah .env di-load)
+BACKEND_PATHS = {"chroma": MEMORY_DB_PATH, "numpy": INDEX_PATH}
+EMBED_MODEL = "all-MiniLM-L6-v2"
+WRITE_BATCH_SIZE = 8      # Flush kalau antrean sudah sebanyak ini
+WRITE_IDLE_FLUSH = 2.0    # ... atau kalau tidak ada memory baru selama N detik
+EMBED_CACHE_SIZE = 256    # LRU embedding query (key: query ternormalisasi)
+RESULT_CACHE_SIZE = 128   # LRU hasil recall (key: query, n_results, filter)
+
+# --- COMPACTION & RETENTION ---
+COMPACT_INTERVAL = 600      # Detik antar putaran compaction di background
+NEAR_DUP_THRESHOLD = 0.95   # Cosine similarity >= ini dianggap memory yang sama
+COMPACT_SLICE = 200         # Id per operasi update/delete (recall cuma nunggu 1 slice)
+EVICTION_POLICY = "lru"     # "lru" (last_recalled paling lama) atau "oldest" (timestamp)
+RETENTION = {
+    "preference": {"max_count": 200, "max_age_days": None},
+    "fact": {"max_count": 1000, "max_age_days": None},
+    "conversation": {"max_count": 500, "max_age_days": 30},
+}
+
+def normalize_query(text):
+    return " ".join(text.lower().strip(" .,!?").split())
+
+def memory_id(memory_type, user_input):
+    """Id berbasis isi: input yang sama (per type) selalu menimpa entry yang sama."""
+    return hashlib.sha1(f"{memory_type}|{normalize_query(user_input)}".encode("utf-8")).hexdigest()
+
+def load_embedder(model_name=EMBED_MODEL):
+    """
+    Load SentenceTransformer dari cache lokal saja (tanpa HEAD check ke HuggingFace).
+    Hanya kalau model belum pernah di-download, fallback ke download sekali.
+    """
+    from sentence_transformers import SentenceTransformer
+    try:
+        return SentenceTransformer(model_name, local_files_only=True)
+    except Exception:
+        print(f"{Fore.YELLOW}[MEMORY] Model '{model_name}' not in local cache, downloading once...{Style.RESET_ALL}")
+        return SentenceTransformer(model_name)
+
 class MemoryManager:
-    def __init__(self):
-        # Pastikan path ini sesuai / konsisten
-        self.client = chromadb.PersistentClient(path="kevin_memory_db")
-        self.collection = self.client.get_or_create_collection(name="user_interactions")
+    def __init__(self, path=None, backend=None, preferences=None, embedder=None):
+        backend = backend or os.getenv("KEVIN_MEMORY_BACKEND", DEFAULT_BACKEND)
+        # Embedding model di-load paralel dengan buka vector store
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            embedder_future = pool.submit(load_embedder) if embedder is None else None
+            # Embedding dihitung sendiri (self.embed), backend cuma simpan + cari
+            self.store = open_backend(backend, path or BACKEND_PATHS[backend])
+            self.embedder = embedder_future.result() if embedder_future else embedder
+        print(f"{Fore.YELLOW}[MEMORY] Backend: {backend} ({self.store.count()} memories).{Style.RESET_ALL}")
+        # Preference terstruktur (fast path command); isi dari store kalau masih kosong
+        self.preferences = preferences
+        if preferences is not None and not preferences.slots and self.store.count():
+            preferences.backfill(self.store)
+        # Worker khusus memory: semua akses store/embedding dari versi async lewat sini
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory")
+
+        # Cache recall: embedding query + hasil query, di-invalidate oleh write_version
+        self.write_version = 0
+        self._embed_cache = OrderedDict()
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {"embed_hits": 0, "embed_misses": 0, "result_hits": 0, "result_misses": 0, "stale_dropped": 0}
+        self._touched = {}  # id -> waktu recall terakhir (ditulis oleh compactor, bukan di jalur recall)
+
+        # Write-behind queue: add_memory cuma antre, writer thread yang embed + insert per batch
+        self._pending = []
+        self._last_enqueue = 0.0
+        self._closed = False
+        self._write_cond = threading.Condition()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="memory-writer")
+        self._writer.start()
+        atexit.register(self.close)
+
+        self.compactor = MemoryCompactor(self)
+        self.compactor.start()
+
+    async def aadd_memory(self, user_input, assistant_reply, memory_type):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._worker, self.add_memory, user_input, assistant_reply, memory_type)
+
+    async def aretrieve_memory(self, query, n_results=2, memory_type_filter=None, deadline=None):
+        """
+        Versi async retrieve_memory: embedding + query jalan di worker, event loop tetap bebas.
+        deadline (detik): request yang baru diambil worker setelah lewat deadline langsung dibuang
+        (pemanggilnya sudah timeout), jadi tidak menumpuk delay untuk recall berikutnya.
+        """
+        loop = asyncio.get_running_loop()
+        expires = time.monotonic() + deadline if deadline else None
+        return await loop.run_in_executor(self._worker, self._retrieve_unless_stale, expires, query, n_results, memory_type_filter)
+
+    def _retrieve_unless_stale(self, expires, query, n_results, memory_type_filter):
+        if expires is not None and time.monotonic() > expires:
+            with self._cache_lock:
+                self.cache_stats["stale_dropped"] += 1
+            return ""
+        return self.retrieve_memory(query, n_results, memory_type_filter)
+
+    def close(self):
+        """Stop writer, simpan semua yang masih antre, lalu matikan worker. Aman dipanggil berkali-kali."""
+        with self._write_cond:
+            if self._closed: return
+            self._closed = True
+            self._write_cond.notify_all()
+        self.compactor.stop()
+        self._writer.join(timeout=30)
+        self.flush()
+        self._worker.shutdown(wait=True)
+        self.store.close()
+
+    def flush(self):
+        """Simpan semua memory yang masih antre sekarang juga (blocking)."""
+        with self._write_cond:
+            batch, self._pending = self._pending, []
+        if batch:
+            # Lewat worker juga: semua write ke store berurutan dengan slice compactor
+            self._worker.submit(self._store_batch, batch).result()
+
+    def _writer_loop(self):
+        while True:
+            with self._write_cond:
+                while not self._pending and not self._closed:
+                    self._write_cond.wait()
+                if not self._pending:
+                    return
+                # Tunggu sampai batch penuh atau idle; saat shutdown langsung flush
+                while len(self._pending) < WRITE_BATCH_SIZE and not self._closed:
+                    remaining = self._last_enqueue + WRITE_IDLE_FLUSH - time.monotonic()
+                    if remaining <= 0: break
+                    self._write_cond.wait(remaining)
+                batch, self._pending = self._pending, []
+            if not batch:
+                continue  # Sudah diambil flush() selagi menunggu
+            try:
+                # Lewat worker memory supaya tidak balapan dengan recall
+                self._worker.submit(self._store_batch, batch).result()
+            except Exception as e:
+                print(f"{Fore.RED}[MEMORY ERROR] Batch store failed, will retry: {e}{Style.RESET_ALL}")
+                with self._write_cond:
+                    self._pending[:0] = batch
+                    if self._closed: return
+                    self._write_cond.wait(WRITE_IDLE_FLUSH)
+
+    def embed(self, texts):
+        return self.embedder.encode(texts, normalize_embeddings=True).tolist()
+
+    def embed_query(self, query):
+        key = normalize_query(query)
+        with self._cache_lock:
+            if key in self._embed_cache:
+                self._embed_cache.move_to_end(key)
+                self.cache_stats["embed_hits"] += 1
+                return self._embed_cache[key]
+            self.cache_stats["embed_misses"] += 1
+        embedding = self.embed([key])[0]
+        with self._cache_lock:
+            self._embed_cache[key] = embedding
+            if len(self._embed_cache) > EMBED_CACHE_SIZE:
+                self._embed_cache.popitem(last=False)
+        return embedding
+
+    def _touch(self, ids):
+        # Catat waktu recall untuk eviction LRU; ditulis ke store oleh compactor
+        now = time.time()
+        for memory_id_ in ids:
+            self._touched[memory_id_] = now
+
+    def cache_info(self):
+        """Statistik cache recall (untuk sizing EMBED_CACHE_SIZE / RESULT_CACHE_SIZE)."""
+        with self._cache_lock:
+            info = dict(self.cache_stats)
+            info.update(embed_size=len(self._embed_cache), result_size=len(self._result_cache), write_version=self.write_version)
+        for kind in ("embed", "result"):
+            total = info[f"{kind}_hits"] + info[f"{kind}_misses"]
+            info[f"{kind}_hit_rate"] = info[f"{kind}_hits"] / total if total else 0.0
+        return info
 
     def add_memory(self, user_input, assistant_reply, memory_type):
         """
         [EPIC 4] Noise Filter & Taxonomy Lock
+        Write-behind: cuma masuk antrean (murah), disimpan batch oleh writer thread.
+        Return True kalau record masuk antrean.
         """
         # Rule 1: Taxonomy Lock - Skip is Skip.
         if memory_type == "skip":
-            return
+            return False
 
         # Rule 2: Noise Filter (Panjang kata)
         # Jangan simpan input pendek kecuali itu explicit preference
         if len(user_input.split()) < 3 and memory_type != "preference":
             print(f"{Fore.LIGHTBLACK_EX}[MEMORY] Skipped (Too short/noise){Style.RESET_ALL}")
-            return
+            return False
 
         # Rule 3: Format Storage
         text_to_store = f"User: {user_input} | Kevin: {assistant_reply}"
-        
-        self.collection.add(
-            documents=[text_to_store],
-            metadatas=[{
+        now = time.time()
+        if memory_type == "preference" and self.preferences is not None:
+            self.preferences.record(user_input, text_to_store, now)
+        record = {
+            "document": text_to_store,
+            "metadata": {
                 "type": memory_type,
-                "timestamp": time.time(), 
+                "timestamp": now, 
+                "last_recalled": now,
                 "raw_input": user_input
-            }],
-            ids=[str(uuid.uuid4())]
+            },
+            "id": memory_id(memory_type, user_input),
+        }
+        with self._write_cond:
+            self._pending.append(record)
+            self._last_enqueue = time.monotonic()
+            self._write_cond.notify()
+        print(f"{Fore.MAGENTA}[MEMORY] Queued ({memory_type}): {user_input[:30]}...{Style.RESET_ALL}")
+        return True
+
+    def _store_batch(self, batch):
+        """Satu embed batch + satu store.upsert untuk semua record (id sama = timpa)."""
+        batch = list({record["id"]: record for record in batch}.values())
+        documents = [record["document"] for record in batch]
+        self.store.upsert(
+            ids=[record["id"] for record in batch],
+            embeddings=self.embed(documents),
+            documents=documents,
+            metadatas=[record["metadata"] for record in batch],
         )
-        print(f"{Fore.MAGENTA}[MEMORY] Stored ({memory_type}): {user_input[:30]}...{Style.RESET_ALL}")
+        # Collection berubah -> semua hasil recall yang di-cache jadi basi
+        with self._cache_lock:
+            self.write_version += 1
+        print(f"{Fore.MAGENTA}[MEMORY] Stored batch of {len(batch)}.{Style.RESET_ALL}")
 
     def retrieve_memory(self, query, n_results=2, memory_type_filter=None):
         """
         [EPIC 4] Recall Gate Support (Updated for List Filter)
+        Hasil di-cache per (query, n_results, filter) selama write_version belum berubah.
         """
+        type_key = tuple(sorted(memory_type_filter)) if isinstance(memory_type_filter, list) else memory_type_filter
+        cache_key = (normalize_query(query), n_results, type_key)
+        with self._cache_lock:
+            cached = self._result_cache.get(cache_key)
+            if cached and cached[0] == self.write_version:
+                self._result_cache.move_to_end(cache_key)
+                self.cache_stats["result_hits"] += 1
+                self._touch(cached[2])
+                return cached[1]
+            self.cache_stats["result_misses"] += 1
+            version = self.write_version
+
         try:
-            where_clause = None
+            types = None
             if memory_type_filter:
                 # Support list: ["fact", "preference"]
-                if isinstance(memory_type_filter, list):
-                    where_clause = {"type": {"$in": memory_type_filter}}
-                else:
-                    where_clause = {"type": memory_type_filter}
-
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=where_clause 
-            )
-            
-            if results and results['documents']:
-                memories = [doc for doc in results['documents'][0]]
-                return "\n".join(memories)
-            return ""
+                types = list(memory_type_filter) if isinstance(memory_type_filter, list) else [memory_type_filter]
+
+            results = self.store.query(self.embed_query(query), n_results, types)
+            recalled = "\n".join(results["documents"])
+            ids = results["ids"]
+            with self._cache_lock:
+                self._touch(ids)
+                self._result_cache[cache_key] = (version, recalled, ids)
+                if len(self._result_cache) > RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+            return recalled
         except Exception as e:
             print(f"{Fore.RED}[MEMORY ERROR] {e}{Style.RESET_ALL}")
-            return ""
\ No newline at end of file
+            return ""
+
+
+class MemoryCompactor:
+    """
+    Compaction incremental di background:
+    1. Tulis last_recalled hasil recall (untuk eviction LRU).
+    2. Gabung near-duplicate per memory_type (cosine >= NEAR_DUP_THRESHOLD, yang terbaru dipertahankan).
+    3. Terapkan RETENTION (max_count / max_age_days) dengan EVICTION_POLICY.
+    Setiap baca/tulis Chroma dikirim ke worker memory per slice kecil, jadi recall
+    paling lama cuma menunggu satu slice. Perhitungan numpy jalan di thread compactor.
+    """
+    def __init__(self, manager, interval=COMPACT_INTERVAL, retention=RETENTION, policy=EVICTION_POLICY, threshold=NEAR_DUP_THRESHOLD):
+        self.manager = manager
+        self.interval = interval
+        self.retention = retention
+        self.policy = policy
+        self.threshold = threshold
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="memory-compactor")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=30)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"{Fore.RED}[MEMORY ERROR] Compaction failed: {e}{Style.RESET_ALL}")
+
+    def _submit(self, fn, *args):
+        return self.manager._worker.submit(fn, *args).result()
+
+    def _read(self, fn):
+        """Baca store di worker; return (write_version saat baca, hasil)."""
+        def read():
+            with self.manager._cache_lock:
+                version = self.manager.write_version
+            return version, fn()
+        return self._submit(read)
+
+    def _apply_if_unchanged(self, version, fn):
+        """
+        Tulis hasil plan hanya kalau belum ada write sejak snapshot dibaca (cek + tulis dalam
+        satu task worker, jadi atomic terhadap write-behind). Return False kalau snapshot basi.
+        """
+        def apply():
+            with self.manager._cache_lock:
+                if self.manager.write_version != version:
+                    return False
+            fn()
+            return True
+        return self._submit(apply)
+
+    def run_once(self):
+        t_start = time.perf_counter()
+        stats = {"touched": self._apply_touches(), "merged": 0, "evicted": 0}
+        for memory_type, limits in self.retention.items():
+            if self._stop.is_set(): break
+            version, got = self._read(lambda t=memory_type: self.manager.store.get(memory_type=t, include_embeddings=True))
+            delete_ids, updates, merged = self._plan(got, limits)
+            slices = [lambda c=updates[s:s + COMPACT_SLICE]: self.manager.store.update_metadata([i for i, _ in c], [m for _, m in c])
+                      for s in range(0, len(updates), COMPACT_SLICE)]
+            slices += [lambda c=delete_ids[s:s + COMPACT_SLICE]: self.manager.store.delete(c)
+                       for s in range(0, len(delete_ids), COMPACT_SLICE)]
+            # Ada upsert baru di tengah jalan -> plan basi, sisa slice dibatalkan (dicoba lagi interval berikutnya)
+            if not all(self._apply_if_unchanged(version, fn) for fn in slices):
+                stats["stale"] = stats.get("stale", 0) + 1
+                continue
+            stats["merged"] += merged
+            stats["evicted"] += len(delete_ids) - merged
+        if stats["merged"] or stats["evicted"]:
+            with self.manager._cache_lock:
+                self.manager.write_version += 1
+        print(f"{Fore.LIGHTBLACK_EX}[MEMORY] Compaction {stats} in {time.perf_counter() - t_start:.2f}s{Style.RESET_ALL}")
+        return stats
+
+    def _apply_touches(self):
+        with self.manager._cache_lock:
+            touched, self.manager._touched = self.manager._touched, {}
+        ids = list(touched)
+        def touch_chunk(chunk):
+            # get + update dalam satu task worker: metadata tidak bisa ditimpa upsert di antaranya
+            got = self.manager.store.get(ids=chunk)
+            metadatas = [dict(meta, last_recalled=touched[i]) for i, meta in zip(got["ids"], got["metadatas"])]
+            if metadatas:
+                self.manager.store.update_metadata(got["ids"], metadatas)
+        for start in range(0, len(ids), COMPACT_SLICE):
+            self._submit(touch_chunk, ids[start:start + COMPACT_SLICE])
+        return len(ids)
+
+    def _plan(self, got, limits):
+        """Return (ids yang dihapus, [(id, metadata baru)] untuk survivor, jumlah merge)."""
+        ids = got["ids"]
+        if not ids:
+            return [], [], 0
+        metas = [dict(m) for m in got["metadatas"]]
+        emb = np.asarray(got["embeddings"], dtype=np.float32)
+        emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-8
+        ts = np.array([m.get("timestamp", 0.0) for m in metas])
+
+        # Near-duplicate: greedy dari yang terbaru, bandingkan ke semua survivor sekaligus
+        kept = np.empty((len(ids), emb.shape[1]), dtype=np.float32)
+        kept_idx, delete_ids, changed = [], [], set()
+        for i in np.argsort(-ts):
+            if kept_idx:
+                sims = kept[:len(kept_idx)] @ emb[i]
+                j = int(np.argmax(sims))
+                if sims[j] >= self.threshold:
+                    survivor = metas[kept_idx[j]]
+                    survivor["last_recalled"] = max(survivor.get("last_recalled", 0.0), metas[i].get("last_recalled", 0.0))
+                    survivor["merged_count"] = survivor.get("merged_count", 0) + 1 + metas[i].get("merged_count", 0)
+                    changed.add(kept_idx[j])
+                    delete_ids.append(ids[i])
+                    continue
+            kept[len(kept_idx)] = emb[i]
+            kept_idx.append(i)
+        merged = len(delete_ids)
+
+        # Retention: umur dulu, lalu jumlah (urut sesuai policy)
+        survivors = kept_idx
+        if limits.get("max_age_days"):
+            cutoff = time.time() - limits["max_age_days"] * 86400
+            delete_ids += [ids[i] for i in survivors if ts[i] < cutoff]
+            survivors = [i for i in survivors if ts[i] >= cutoff]
+        max_count = limits.get("max_count")
+        if max_count is not None and len(survivors) > max_count:
+            field = "last_recalled" if self.policy == "lru" else "timestamp"
+            survivors.sort(key=lambda i: metas[i].get(field, metas[i].get("timestamp", 0.0)))
+            overflow = len(survivors) - max_count
+            delete_ids += [ids[i] for i in survivors[:overflow]]
+            survivors = survivors[overflow:]
+
+        alive = set(survivors)
+        updates = [(ids[i], metas[i]) for i in changed if i in alive]
+        return delete_ids, updates, merged
@@ -0,0 +1,40 @@
+import argparse
+import time
+from colorama import Fore, Style, init
+
+from memory_backend import open_backend
+from memory_core import BACKEND_PATHS
+
+init(autoreset=True)
+
+BATCH = 500
+
+
+def migrate(src_name, dst_name, src_path=None, dst_path=None):
+    """Copy semua memory (embedding + metadata) dari satu backend ke backend lain. Id sama = timpa."""
+    t_start = time.perf_counter()
+    src = open_backend(src_name, src_path or BACKEND_PATHS[src_name])
+    dst = open_backend(dst_name, dst_path or BACKEND_PATHS[dst_name])
+    got = src.get(include_embeddings=True)
+    total = len(got["ids"])
+    for start in range(0, total, BATCH):
+        end = start + BATCH
+        dst.upsert(got["ids"][start:end], got["embeddings"][start:end], got["documents"][start:end], got["metadatas"][start:end])
+        print(f"{Fore.CYAN}[MIGRATE] {min(end, total)}/{total}{Style.RESET_ALL}")
+    src.close()
+    dst.close()
+    print(f"{Fore.GREEN}[MIGRATE] {src_name} -> {dst_name}: {total} memories in {time.perf_counter() - t_start:.2f}s "
+          f"(destination now has {dst.count()}).{Style.RESET_ALL}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pindahkan memory Kevin antar vector backend.")
+    parser.add_argument("direction", choices=["chroma-to-numpy", "numpy-to-chroma"])
+    parser.add_argument("--src", help="Path store asal (default sesuai backend)")
+    parser.add_argument("--dst", help="Path store tujuan (default sesuai backend)")
+    args = parser.parse_args()
+    src_name, dst_name = args.direction.split("-to-")
+    migrate(src_name, dst_name, args.src, args.dst)
+    if dst_name == "numpy":
+        print(f"{Fore.YELLOW}[MIGRATE] Set KEVIN_MEMORY_BACKEND=numpy di .env untuk memakai index baru.{Style.RESET_ALL}")
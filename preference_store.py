@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+
+PREFERENCE_PATH = "kevin_preferences.json"
+
+# Slot -> kata yang menandakan command menyinggung slot ini + nilai yang dikenal
+PREFERENCE_SLOTS = {
+    "music": {
+        "mentions": ["lagu", "musik", "music", "song", "putar", "play", "playlist"],
+        "values": ["spotify", "youtube music", "apple music", "soundcloud", "deezer"],
+    },
+    "browser": {
+        "mentions": ["browser", "search", "cari", "google", "website", "situs", "web", "internet"],
+        "values": ["chrome", "firefox", "edge", "brave", "opera"],
+    },
+    "video": {
+        "mentions": ["video", "nonton", "watch", "film", "movie"],
+        "values": ["youtube", "netflix", "vlc"],
+    },
+    "editor": {
+        "mentions": ["code", "coding", "ngoding", "editor", "catat", "catatan", "note"],
+        "values": ["vscode", "vs code", "notepad", "sublime", "pycharm"],
+    },
+    "chat": {
+        "mentions": ["chat", "pesan", "message", "kirim", "dm"],
+        "values": ["whatsapp", "discord", "telegram", "slack"],
+    },
+}
+
+
+def _word_pattern(words):
+    # Nilai panjang duluan supaya "youtube music" menang atas "youtube"
+    words = sorted(words, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(w) for w in words) + r")\b", re.IGNORECASE)
+
+
+_MENTIONS = {slot: _word_pattern(cfg["mentions"] + cfg["values"]) for slot, cfg in PREFERENCE_SLOTS.items()}
+_VALUES = {slot: _word_pattern(cfg["values"]) for slot, cfg in PREFERENCE_SLOTS.items()}
+
+
+class PreferenceStore:
+    """
+    Preference terstruktur: slot -> {value, document, timestamp} di file JSON.
+    Di-update setiap memory 'preference' ditulis; command turn cukup lookup per slot
+    yang disebut di command (tanpa embedding / vector search). File JSON ditulis di
+    thread sendiri (record() dipanggil dari event loop).
+    """
+    def __init__(self, path=PREFERENCE_PATH):
+        self.path = path
+        self.slots = {}
+        self._lock = threading.Lock()
+        self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preference-save")
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.slots = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"{Fore.RED}[PREFERENCE] Failed to load {path}: {e}{Style.RESET_ALL}")
+
+    @staticmethod
+    def classify(text):
+        """Return (slot, value) dari teks preference. Value None kalau slot cuma disinggung."""
+        for slot, pattern in _VALUES.items():
+            match = pattern.search(text)
+            if match:
+                return slot, match.group(1).lower()
+        for slot, pattern in _MENTIONS.items():
+            if pattern.search(text):
+                return slot, None
+        return None, None
+
+    def record(self, user_input, document, timestamp=None):
+        """Simpan preference ke slot-nya (yang terbaru menang). Return slot atau None."""
+        slot, value = self.classify(user_input)
+        if slot is None:
+            return None
+        timestamp = timestamp or time.time()
+        with self._lock:
+            current = self.slots.get(slot)
+            if current and current["timestamp"] > timestamp:
+                return slot
+            if value is None and current and current.get("value"):
+                return slot  # Cuma menyinggung slot: value yang sudah ada jangan ditimpa
+            self.slots[slot] = {"value": value, "document": document, "timestamp": timestamp}
+            snapshot = json.dumps(self.slots, ensure_ascii=False, indent=2)
+        # Worker tunggal: urutan tulis tetap sama dengan urutan record
+        self._saver.submit(self._save, snapshot)
+        print(f"{Fore.MAGENTA}[PREFERENCE] {slot} = {value or '(note)'}{Style.RESET_ALL}")
+        return slot
+
+    def _save(self, snapshot):
+        try:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"{Fore.RED}[PREFERENCE] Failed to save {self.path}: {e}{Style.RESET_ALL}")
+
+    def flush(self):
+        """Tunggu semua tulisan file selesai (dipakai saat shutdown / tes)."""
+        self._saver.submit(lambda: None).result()
+
+    def lookup(self, text):
+        """Preference untuk slot yang disebut di command, format sama dengan hasil recall."""
+        with self._lock:
+            if not self.slots:
+                return ""
+            hits = [self.slots[slot]["document"] for slot, pattern in _MENTIONS.items()
+                    if slot in self.slots and pattern.search(text)]
+        return "\n".join(hits)
+
+    def backfill(self, store):
+        """Isi slot dari memory 'preference' yang sudah ada di vector store (sekali, saat file belum ada)."""
+        got = store.get(memory_type="preference")
+        rows = sorted(zip(got["metadatas"], got["documents"]), key=lambda row: row[0].get("timestamp", 0.0))
+        for metadata, document in rows:
+            self.record(metadata.get("raw_input", ""), document, metadata.get("timestamp"))
+        return len(rows)
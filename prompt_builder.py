@@ -0,0 +1,72 @@
+import math
+
+# Budget token per intent untuk bagian dinamis prompt
+PROMPT_BUDGETS = {
+    "command": {"context": 24, "memory": 60},
+    "conversation": {"context": 32, "memory": 200},
+}
+CHARS_PER_TOKEN = 4   # Estimasi kasar tokenizer Llama 3 untuk teks campuran ID/EN
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def minify(block):
+    """Buang indentasi, spasi ganda, dan baris kosong dari blok prompt triple-quoted."""
+    lines = (" ".join(line.split()) for line in block.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def truncate_tokens(text, budget):
+    """Potong teks ke budget token (di batas kata, tanda '…' kalau terpotong)."""
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:max(0, budget * CHARS_PER_TOKEN - 1)]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "…"
+
+
+def fit_memories(memories, budget):
+    """Ambil memory (satu per baris, urut relevansi) selama masih muat di budget."""
+    kept, used = [], 0
+    for line in filter(None, memories.split("\n")):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            if not kept:
+                kept.append(truncate_tokens(line, budget))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+class PromptBuilder:
+    """
+    Prefix statis (mode + core) di-minify sekali di __init__, jadi byte-identical tiap turn
+    (prompt caching di sisi provider bisa kena). Bagian dinamis ([CONTEXT], [RELEVANT MEMORY])
+    ditaruh setelah prefix dan dipotong sesuai budget per intent.
+    """
+    def __init__(self, core, modes, budgets=PROMPT_BUDGETS):
+        self.budgets = budgets
+        self.prefixes = {intent: f"{minify(mode)}\n{minify(core)}" for intent, mode in modes.items()}
+        self.prefix_tokens = {intent: estimate_tokens(prefix) for intent, prefix in self.prefixes.items()}
+
+    def build(self, intent_type, window_title, memories, user_text):
+        """Return (messages, report token per bagian)."""
+        budget = self.budgets[intent_type]
+        context = f"\n\n[CONTEXT]\nActive Window: '{truncate_tokens(window_title, budget['context'])}'"
+        memory = fit_memories(memories, budget["memory"]) if memories else ""
+        if memory:
+            context += f"\n[RELEVANT MEMORY (Use Silently)]: {memory}"
+        messages = [
+            {"role": "system", "content": self.prefixes[intent_type] + context},
+            {"role": "user", "content": user_text},
+        ]
+        report = {
+            "prefix": self.prefix_tokens[intent_type],
+            "context": estimate_tokens(context) - estimate_tokens(memory),
+            "memory": estimate_tokens(memory),
+            "user": estimate_tokens(user_text),
+        }
+        report["total"] = sum(report.values())
+        return messages, report
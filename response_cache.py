@@ -0,0 +1,153 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from colorama import Fore, Style
+
+from memory_core import normalize_query
+
+RESPONSE_CACHE_SIZE = 256
+# Command stabil (buka chrome tetap buka chrome); conversation cepat basi
+RESPONSE_CACHE_TTL = {"command": 24 * 3600, "conversation": 600}
+SIMILARITY_THRESHOLD = {"command": 0.95, "conversation": 0.97}
+NEVER_CACHE_ACTIONS = {"type", "system"}   # Payload bebas / destructive: selalu tanya LLM
+MIN_CONFIDENCE = 0.6
+RELATED_SIMILARITY = 0.5   # Memory baru dianggap menyangkut jawaban cache kalau cosine prompt-nya >= ini
+KNOWN_APPS = ("spotify", "chrome", "edge", "firefox", "discord", "youtube", "whatsapp", "telegram",
+              "visual studio code", "notepad", "notion", "explorer")
+
+# Kelas verb yang saling berlawanan: embedding "buka X" vs "tutup X" bisa >= 0.95 padahal aksinya beda
+VERB_CLASSES = {
+    "open": r"buka|bukain|bukakan|open|jalankan|launch|start",
+    "close": r"tutup|tutupin|close|quit|exit|keluar",
+    "up": r"naik|naikkan|naikin|besarkan|gedein|kerasin|up|louder|atas",
+    "down": r"turun|turunkan|turunin|kecilkan|kecilin|pelanin|down|quieter|bawah",
+    "next": r"next|skip|selanjutnya|berikutnya|lewati",
+    "prev": r"prev|previous|sebelumnya|back|balik",
+    "mute": r"mute|unmute|bisukan|diamkan",
+    "play": r"play|putar|setel|resume|lanjutkan|lanjutin",
+    "pause": r"pause|stop|jeda",
+}
+_VERB_PATTERNS = {name: re.compile(rf"\b(?:{words})\b") for name, words in VERB_CLASSES.items()}
+
+
+def command_signature(text):
+    """Kelas verb + nama app yang disebut; command cuma boleh hit kalau signature-nya sama persis."""
+    text = normalize_query(text)
+    verbs = {name for name, pattern in _VERB_PATTERNS.items() if pattern.search(text)}
+    apps = {app for app in KNOWN_APPS if re.search(rf"\b{re.escape(app)}\b", text)}
+    return frozenset(verbs), frozenset(apps)
+
+
+def window_class(title):
+    """Judul window -> kelas aplikasi (judul lengkap terlalu spesifik untuk key cache)."""
+    title = (title or "").lower()
+    for app in KNOWN_APPS:
+        if app in title:
+            return app
+    return title.rsplit(" - ", 1)[-1].strip()[:40] or "unknown"
+
+
+class ResponseCache:
+    """
+    Cache semantik keputusan LLM. Key: embedding prompt ternormalisasi + intent + kelas window.
+    Hit kalau cosine >= threshold per intent dan belum lewat TTL; untuk command, signature
+    verb/app juga harus sama. LRU dengan batas ukuran.
+    Sebelum embedder siap, cuma exact match teks ternormalisasi.
+    """
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, thresholds=SIMILARITY_THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.thresholds = thresholds
+        self._embed = None
+        self._entries = OrderedDict()   # (intent, window, teks) -> {"vector", "response", "expires"}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "skipped": 0}
+
+    def attach_embedder(self, embed_query):
+        """embed_query(teks) -> vektor ternormalisasi (pakai cache embedding MemoryManager)."""
+        self._embed = embed_query
+
+    def _vector(self, text):
+        return np.asarray(self._embed(text), dtype=np.float32) if self._embed else None
+
+    def lookup(self, text, intent_type, window_title):
+        """Return JSON keputusan yang di-cache, atau None."""
+        key = (intent_type, window_class(window_title), normalize_query(text))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires"] > now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry["response"]
+        vector = self._vector(text)
+        signature = command_signature(text) if intent_type == "command" else None
+        best_key, best_sim = None, -1.0
+        if vector is not None:
+            with self._lock:
+                candidates = [(k, e) for k, e in self._entries.items()
+                              if k[:2] == key[:2] and e["expires"] > now and e["vector"] is not None
+                              and e["signature"] == signature]
+            if candidates:
+                sims = np.stack([e["vector"] for _, e in candidates]) @ vector
+                best = int(np.argmax(sims))
+                best_key, best_sim = candidates[best][0], float(sims[best])
+        with self._lock:
+            if best_key and best_sim >= self.thresholds.get(intent_type, 1.0) and best_key in self._entries:
+                self._entries.move_to_end(best_key)
+                self.stats["hits"] += 1
+                print(f"{Fore.GREEN}[RESPONSE CACHE] Hit ({best_sim:.3f}): '{best_key[2]}'{Style.RESET_ALL}")
+                return self._entries[best_key]["response"]
+            self.stats["misses"] += 1
+        return None
+
+    @staticmethod
+    def cacheable(response_json_str):
+        try:
+            data = json.loads(response_json_str)
+        except (TypeError, ValueError):
+            return False
+        if not isinstance(data, dict) or not data.get("reply"):
+            return False
+        if data.get("requires_confirmation") or data.get("confidence", 0.0) < MIN_CONFIDENCE:
+            return False
+        return data.get("action", "none") not in NEVER_CACHE_ACTIONS
+
+    def store(self, text, intent_type, window_title, response_json_str):
+        if not self.cacheable(response_json_str):
+            self.stats["skipped"] += 1
+            return False
+        key = (intent_type, window_class(window_title), normalize_query(text))
+        entry = {"vector": self._vector(text), "response": response_json_str,
+                 "signature": command_signature(text) if intent_type == "command" else None,
+                 "expires": time.time() + self.ttl.get(intent_type, 0)}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self.stats["stores"] += 1
+        return True
+
+    def invalidate(self, intent_type=None):
+        """Buang entry (per intent atau semua), mis. setelah preference berubah."""
+        with self._lock:
+            for key in [k for k in self._entries if intent_type is None or k[0] == intent_type]:
+                del self._entries[key]
+
+    def invalidate_related(self, text, intent_type="conversation", threshold=RELATED_SIMILARITY):
+        """
+        Buang entry yang prompt-nya mirip text (memory baru yang kemungkinan ikut ter-recall
+        untuk prompt itu). Tanpa embedder: buang semua entry intent tersebut.
+        """
+        vector = self._vector(text)
+        if vector is None:
+            return self.invalidate(intent_type)
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if k[0] == intent_type
+                     and (e["vector"] is None or float(e["vector"] @ vector) >= threshold)]
+            for key in stale:
+                del self._entries[key]
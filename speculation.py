@@ -0,0 +1,154 @@
+import asyncio
+import time
+from colorama import Fore, Style
+
+WINDOW_SNAPSHOT_TTL = 3.0   # Snapshot window dari onset masih dianggap valid selama ini
+WARM_IDLE_SECONDS = 4.0     # Warm-up koneksi kalau tidak ada request selama ini (keep-alive bisa sudah putus)
+PARTIAL_AFTER = 1.2         # Transkrip parsial diambil kalau utterance masih jalan setelah N detik
+PARTIAL_MAX_GAP = 0.3       # ...dan masih bersuara: hening lebih lama = kemungkinan sudah masuk pause akhir
+PARTIAL_MATCH = 0.75        # Fraksi kata transkrip parsial yang harus ada di teks final
+
+
+def partial_matches(partial, final):
+    """Teks final tidak menyimpang dari parsial: sebagian besar kata parsial muncul di final."""
+    partial_words = partial.lower().strip(" .,!?").split()
+    final_words = set(final.lower().strip(" .,!?").split())
+    if not partial_words:
+        return False
+    return sum(word in final_words for word in partial_words) / len(partial_words) >= PARTIAL_MATCH
+
+
+class _Turn:
+    def __init__(self, onset_pos):
+        self.onset_pos = onset_pos
+        self.started = time.monotonic()
+        self.captured = False
+        self.window = None
+        self.window_time = 0.0
+        self.partial_text = None
+        self.recall_task = None
+        self.tasks = []
+
+
+class Speculator:
+    """
+    Pre-work spekulatif mulai dari onset speech (sebelum transkrip final ada):
+    snapshot window aktif, warm-up koneksi HTTP, STT parsial + memory recall dari
+    transkrip parsial. Hasil dipakai kalau teks final cocok, selain itu dibuang.
+    Onset saat allow_prework() False (mis. idle, belum lolos wake word) diabaikan, jadi
+    noise idle tidak memicu traffic. Semua callable di-inject supaya modul ini tidak tahu soal Groq/mic.
+    """
+    def __init__(self, snapshot_window, warm, transcribe_partial, recall, read_audio, allow_prework,
+                 voice_gap=None, warm_idle=WARM_IDLE_SECONDS):
+        self.snapshot_window = snapshot_window
+        self.warm = warm
+        self.transcribe_partial = transcribe_partial
+        self.recall = recall
+        self.read_audio = read_audio
+        self.allow_prework = allow_prework
+        self.voice_gap = voice_gap or (lambda: 0.0)   # Detik sejak frame speech terakhir (None = belum ada)
+        self.warm_idle = warm_idle
+        self.current = None
+        self.last_network = 0.0
+        self.stats = {"onsets": 0, "warmups": 0, "window_used": 0, "window_stale": 0,
+                      "partial_stt": 0, "recall_used": 0, "recall_discarded": 0, "ignored": 0,
+                      "partial_skipped": 0}
+
+    def touch(self):
+        """Dipanggil setelah request network sungguhan (STT/LLM): koneksi masih hangat."""
+        self.last_network = time.monotonic()
+
+    def idle_seconds(self):
+        return time.monotonic() - self.last_network
+
+    def on_onset(self, onset_pos):
+        """Panggil dari event loop (pakai call_soon_threadsafe dari thread capture)."""
+        self.discard()
+        if not self.allow_prework():
+            self.stats["ignored"] += 1
+            return
+        turn = self.current = _Turn(onset_pos)
+        self.stats["onsets"] += 1
+        turn.tasks.append(asyncio.create_task(self._snapshot(turn)))
+        if self.idle_seconds() > self.warm_idle:
+            self.touch()
+            self.stats["warmups"] += 1
+            turn.tasks.append(asyncio.create_task(self._warm()))
+        turn.tasks.append(asyncio.create_task(self._partial(turn)))
+
+    def on_wake(self):
+        """
+        Wake word lolos saat idle (onset-nya tadi diabaikan): warm-up koneksi sekarang, paralel
+        dengan encode WAV, supaya STT pertama setelah bangun tidak buka TLS baru.
+        Panggil dari event loop.
+        """
+        if self.idle_seconds() > self.warm_idle:
+            self.touch()
+            self.stats["warmups"] += 1
+            asyncio.create_task(self._warm())
+
+    async def _snapshot(self, turn):
+        turn.window = await asyncio.to_thread(self.snapshot_window)
+        turn.window_time = time.monotonic()
+
+    async def _warm(self):
+        try:
+            await self.warm()
+        except Exception as e:
+            print(f"{Fore.LIGHTBLACK_EX}[SPECULATE] Warm-up failed: {e}{Style.RESET_ALL}")
+
+    async def _partial(self, turn):
+        await asyncio.sleep(PARTIAL_AFTER)
+        if turn.captured or turn is not self.current:
+            return  # Utterance sudah selesai: STT final lebih cepat daripada parsial
+        gap = self.voice_gap()
+        if gap is None or gap > PARTIAL_MAX_GAP:
+            # Sudah di trailing silence: capture segera selesai, parsial cuma jadi STT dobel
+            self.stats["partial_skipped"] += 1
+            return
+        samples = self.read_audio(turn.onset_pos)
+        self.stats["partial_stt"] += 1
+        text = await self.transcribe_partial(samples)
+        if text and turn is self.current:
+            turn.partial_text = text
+            turn.recall_task = asyncio.create_task(self.recall(text))
+            print(f"{Fore.LIGHTBLACK_EX}[SPECULATE] Partial: '{text}' -> recall started{Style.RESET_ALL}")
+
+    def captured(self):
+        """Capture selesai (utterance lengkap ada), STT final dimulai."""
+        if self.current:
+            self.current.captured = True
+
+    def take_window(self):
+        """Window dari onset kalau masih fresh, selain itu None (ambil baru)."""
+        turn = self.current
+        if not turn or turn.window is None:
+            return None
+        if time.monotonic() - turn.window_time > WINDOW_SNAPSHOT_TTL:
+            self.stats["window_stale"] += 1
+            return None
+        self.stats["window_used"] += 1
+        return turn.window
+
+    def take_recall(self, final_text):
+        """Task recall spekulatif kalau teks final cocok dengan parsial, selain itu None (dibuang)."""
+        turn = self.current
+        if not turn or turn.recall_task is None:
+            return None
+        task, turn.recall_task = turn.recall_task, None
+        if partial_matches(turn.partial_text, final_text):
+            self.stats["recall_used"] += 1
+            return task
+        task.cancel()
+        self.stats["recall_discarded"] += 1
+        return None
+
+    def discard(self):
+        turn, self.current = self.current, None
+        if not turn:
+            return
+        for task in turn.tasks:
+            if not task.done(): task.cancel()
+        if turn.recall_task:
+            turn.recall_task.cancel()
+            self.stats["recall_discarded"] += 1
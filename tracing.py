@@ -0,0 +1,168 @@
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+from colorama import Fore, Style
+
+TRACE_PATH = "kevin_traces.jsonl"
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+HISTOGRAM_WINDOW = 500        # Sampel terakhir per stage untuk p50/p95/p99
+SUMMARY_EVERY = 10            # Cetak ringkasan tiap N turn
+
+# Metric turunan: (nama, mark/span awal, mark akhir)
+DERIVED = [
+    ("utterance", "speech_onset", "capture_end"),
+    ("vad", "last_voiced", "capture_end"),
+    ("llm_first_token", "llm_start", "llm_first_token"),
+    ("tts_first_byte", "capture_end", "tts_first_byte"),
+    ("time_to_first_audio", "capture_end", "playback_start"),
+    ("turn", "capture_end", "playback_end"),
+]
+
+
+class _NullSpan:
+    def end(self, **attrs):
+        pass
+
+
+class Span:
+    def __init__(self, trace, name, parent, attrs):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.stop = None
+
+    def end(self, **attrs):
+        if self.stop is None:
+            self.stop = time.perf_counter()
+            self.attrs.update(attrs)
+
+
+class TurnTrace:
+    def __init__(self):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.wall_start = time.time()
+        self.t0 = time.perf_counter()
+        self.spans = []
+        self.marks = {}
+        self.attrs = {}
+
+    def to_record(self):
+        ms = lambda t: round((t - self.t0) * 1000, 2)
+        spans = [{"name": s.name, "parent": s.parent, "start_ms": ms(s.start),
+                  "end_ms": ms(s.stop) if s.stop else None,
+                  "dur_ms": round((s.stop - s.start) * 1000, 2) if s.stop else None, **({"attrs": s.attrs} if s.attrs else {})}
+                 for s in self.spans]
+        return {"turn_id": self.turn_id, "ts": self.wall_start, **self.attrs, "spans": spans,
+                "marks": {name: ms(t) for name, t in self.marks.items()}, "derived_ms": self.derived_ms()}
+
+    def derived_ms(self):
+        out = {}
+        for name, start, end in DERIVED:
+            if start in self.marks and end in self.marks and self.marks[end] >= self.marks[start]:
+                out[name] = round((self.marks[end] - self.marks[start]) * 1000, 2)
+        return out
+
+
+class Tracer:
+    """
+    Span tree per turn (root = turn, child = capture/stt/recall/prompt/llm/tts/playback/skill).
+    Satu turn aktif sekaligus (agent-nya serial). Turn diekspor ke JSONL yang di-rotate,
+    durasi per stage masuk histogram rolling yang bisa di-query lewat summary().
+    """
+    def __init__(self, path=TRACE_PATH, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        self.turn = None
+        self.histograms = {}
+        self.turns = 0
+        self._lock = threading.Lock()
+        # Logger per file: Tracer kedua dengan path lain tidak ikut menulis ke file Tracer pertama
+        self._log = logging.getLogger(f"kevin.trace.{os.path.abspath(path)}")
+        self._log.setLevel(logging.INFO)
+        self._log.propagate = False
+        if not self._log.handlers:
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log.addHandler(handler)
+
+    def begin_turn(self):
+        """Tutup turn sebelumnya (kalau ada isinya) lalu mulai turn baru."""
+        self.end_turn()
+        self.turn = TurnTrace()
+        return self.turn
+
+    def annotate(self, **attrs):
+        if self.turn:
+            self.turn.attrs.update(attrs)
+
+    def start_span(self, name, parent="turn", **attrs):
+        if not self.turn:
+            return _NullSpan()
+        span = Span(self.turn, name, parent, attrs)
+        with self._lock:
+            self.turn.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name, parent="turn", **attrs):
+        span = self.start_span(name, parent, **attrs)
+        try:
+            yield span
+        finally:
+            span.end()
+
+    def mark(self, name, at=None, overwrite=False):
+        """Titik waktu (mis. llm_first_token, playback_start). Default hanya kejadian pertama per turn."""
+        turn = self.turn
+        if turn and (overwrite or name not in turn.marks):
+            turn.marks[name] = at if at is not None else time.perf_counter()
+
+    def end_turn(self):
+        turn, self.turn = self.turn, None
+        if not turn or "input" not in turn.attrs:
+            return None  # Turn idle (tidak ada transkrip): tidak diekspor
+        record = turn.to_record()
+        with self._lock:
+            for span in record["spans"]:
+                if span["dur_ms"] is not None:
+                    self._observe(span["name"], span["dur_ms"])
+            for name, value in record["derived_ms"].items():
+                self._observe(name, value)
+            self.turns += 1
+        try:
+            self._log.info(json.dumps(record, ensure_ascii=False))
+        except Exception as e:
+            print(f"{Fore.RED}[TRACE ERROR] {e}{Style.RESET_ALL}")
+        derived = record["derived_ms"]
+        if derived:
+            print(f"{Fore.LIGHTBLACK_EX}[TRACE] " + " | ".join(f"{name} {value:.0f}ms" for name, value in derived.items()) + Style.RESET_ALL)
+        if self.turns % SUMMARY_EVERY == 0:
+            self.print_summary()
+        return record
+
+    def _observe(self, stage, value_ms):
+        self.histograms.setdefault(stage, deque(maxlen=HISTOGRAM_WINDOW)).append(value_ms)
+
+    def summary(self, stage=None):
+        """p50/p95/p99 (ms) rolling per stage; stage=None -> semua."""
+        with self._lock:
+            stages = {stage: self.histograms.get(stage, ())} if stage else dict(self.histograms)
+            out = {}
+            for name, values in stages.items():
+                if not values: continue
+                p50, p95, p99 = np.percentile(list(values), [50, 95, 99])
+                out[name] = {"p50": round(float(p50), 1), "p95": round(float(p95), 1), "p99": round(float(p99), 1), "n": len(values)}
+        return out
+
+    def print_summary(self):
+        for name, stats in sorted(self.summary().items()):
+            print(f"{Fore.LIGHTBLACK_EX}[TRACE] {name:<20} p50 {stats['p50']:>8.1f}ms  p95 {stats['p95']:>8.1f}ms  "
+                  f"p99 {stats['p99']:>8.1f}ms  (n={stats['n']}){Style.RESET_ALL}")
@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import os
+import queue
+import threading
+import time
+import edge_tts
+import miniaudio
+import numpy as np
+import pyaudio
+from colorama import Fore, Style
+
+# --- TTS CONFIG ---
+VOICE = "en-US-ChristopherNeural"
+RATE = "+10%"
+PITCH = "+0Hz"
+TTS_LOOKAHEAD = 2          # Jumlah kalimat yang disintesis duluan selagi kalimat sekarang diputar
+TTS_SAMPLE_RATE = 24000    # edge-tts: audio-24khz-48kbitrate-mono-mp3
+OUTPUT_FRAMES = 512        # ~21 ms per callback -> stop/flush terasa instan
+CACHE_DIR = "kevin_tts_cache"
+CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+
+class AudioOutput:
+    """
+    Satu output stream PyAudio yang hidup terus. PCM ditulis ke buffer,
+    callback mengambilnya; kalau kosong, keluar hening (stream tidak pernah ditutup).
+    flush() membuang antrean dan menaikkan generation, jadi writer lama ikut berhenti.
+    """
+    def __init__(self, rate=TTS_SAMPLE_RATE, frames_per_buffer=OUTPUT_FRAMES):
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.generation = 0
+        self.level = 0.0         # RMS output terbaru (decay), dipakai echo guard barge-in
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+        self._pa = None
+        self._stream = None
+
+    def start(self):
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16, channels=1, rate=self.rate, output=True,
+            frames_per_buffer=self.frames_per_buffer, stream_callback=self._on_audio,
+        )
+        self._stream.start_stream()
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        need = frame_count * 2
+        out = self._pull(need)
+        if len(out) < need:
+            out += b"\x00" * (need - len(out))
+        return (out, pyaudio.paContinue)
+
+    def _pull(self, need):
+        """Ambil maksimal `need` byte PCM dari antrean, update level output."""
+        with self._lock:
+            out = bytes(self._buf[:need])
+            del self._buf[:need]
+        rms = float(np.sqrt(np.mean(np.frombuffer(out, dtype=np.int16).astype(np.float32) ** 2))) if len(out) >= 2 else 0.0
+        # Decay pelan: echo di mic datang sedikit terlambat dari output
+        self.level = max(rms, self.level * 0.8)
+        return out
+
+    @property
+    def busy(self):
+        return len(self._buf) > 0
+
+    def write(self, pcm, generation):
+        """Tambah PCM int16 ke antrean. Return False kalau sudah di-flush sejak generation itu."""
+        with self._lock:
+            if generation != self.generation:
+                return False
+            self._buf += pcm
+            return True
+
+    def flush(self):
+        with self._lock:
+            self._buf.clear()
+            self.generation += 1
+
+    def close(self):
+        try:
+            if self._stream:
+                self._stream.stop_stream()
+                self._stream.close()
+            if self._pa:
+                self._pa.terminate()
+        except Exception:
+            pass
+        self._stream = None
+        self._pa = None
+
+
+class _ChunkSource(miniaudio.StreamableSource):
+    """Sumber MP3 untuk decoder miniaudio: baca chunk dari queue (None = selesai), tanpa copy."""
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._pending = memoryview(b"")
+        self._eof = False
+
+    def read(self, num_bytes):
+        if not len(self._pending) and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._pending = memoryview(chunk)
+        out, self._pending = self._pending[:num_bytes], self._pending[num_bytes:]
+        return out
+
+
+def cache_key(text, voice=VOICE, rate=RATE, pitch=PITCH):
+    return hashlib.sha256(f"{text}|{voice}|{rate}|{pitch}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Cache TTS content-addressed: key = hash(text, voice, rate, pitch) -> file mp3.
+    Di disk dengan batas ukuran (eviction LRU via mtime, di-touch setiap hit).
+    Frasa tetap (ack, konfirmasi) di-preload ke memory sebagai PCM siap putar.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, sample_rate=TTS_SAMPLE_RATE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.pcm = {}            # key -> PCM int16 bytes (sound bank di memory)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, mp3_bytes):
+        if not mp3_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(mp3_bytes)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".mp3"): continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes: break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def decode(self, mp3_bytes):
+        decoded = miniaudio.decode(mp3_bytes, nchannels=1, sample_rate=self.sample_rate)
+        return memoryview(decoded.samples).cast("B").tobytes()
+
+    async def preload(self, phrases, voice=VOICE, rate=RATE, pitch=PITCH, connector=None):
+        """Siapkan sound bank: ambil dari disk (atau sintesis sekali), decode ke PCM di memory."""
+        t_start = time.perf_counter()
+        for text in dict.fromkeys(phrases):
+            key = cache_key(text, voice, rate, pitch)
+            if key in self.pcm: continue
+            try:
+                mp3 = await asyncio.to_thread(self.get, key)
+                if mp3 is None:
+                    audio = SentenceAudio(text, voice, rate, pitch, cache=self, connector=connector).start()
+                    await audio.task
+                    mp3 = audio.mp3
+                self.pcm[key] = await asyncio.to_thread(self.decode, mp3)
+            except Exception as e:
+                print(f"{Fore.RED}[TTS CACHE] Preload failed for '{text}': {e}{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}[SYSTEM] TTS sound bank ready ({len(self.pcm)} phrases, {time.perf_counter() - t_start:.2f}s).{Style.RESET_ALL}")
+
+
+class SentenceAudio:
+    """
+    Audio 1 kalimat. Chunk MP3 dari edge-tts masuk ke queue thread-safe selagi
+    streaming; decoder bisa mulai dari chunk pertama walau sintesis belum selesai.
+    Urutan sumber: PCM di memory -> mp3 di cache disk -> network (lalu disimpan ke cache).
+    """
+    def __init__(self, text, voice=VOICE, rate=RATE, pitch=PITCH, cache=None, connector=None):
+        self.text = text
+        self.voice, self.rate, self.pitch = voice, rate, pitch
+        self.cache = cache
+        self.connector = connector
+        self.key = cache_key(text, voice, rate, pitch)
+        self.pcm = cache.pcm.get(self.key) if cache else None
+        self.chunks = queue.Queue()
+        self.mp3 = b""
+        self.task = None
+        # Timestamp perf_counter untuk tracing: byte audio pertama & PCM pertama ke output
+        self.first_byte_time = time.perf_counter() if self.pcm is not None else None
+        self.first_pcm_time = None
+
+    def start(self):
+        if self.pcm is None:
+            self.task = asyncio.create_task(self._fetch())
+        return self
+
+    async def _fetch(self):
+        try:
+            cached = await asyncio.to_thread(self.cache.get, self.key) if self.cache else None
+            if cached:
+                self.mp3 = cached
+                self.first_byte_time = time.perf_counter()
+                self.chunks.put(cached)
+                return
+            received = []
+            communicate = edge_tts.Communicate(self.text, self.voice, rate=self.rate, pitch=self.pitch, connector=self.connector)
+            async for message in communicate.stream():
+                if message["type"] == "audio":
+                    if self.first_byte_time is None: self.first_byte_time = time.perf_counter()
+                    received.append(message["data"])
+                    self.chunks.put(message["data"])
+            self.mp3 = b"".join(received)
+            if self.cache:
+                await asyncio.to_thread(self.cache.put, self.key, self.mp3)
+        finally:
+            self.chunks.put(None)
+
+    def cancel(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+        # Task yang di-cancel sebelum sempat jalan tidak pernah sampai ke finally _fetch:
+        # tutup queue di sini supaya decoder di executor tidak menunggu selamanya
+        self.chunks.put(None)
+
+    def play_blocking(self, output):
+        """Decode incremental ke output (blocking, jalankan di executor). Berhenti kalau output di-flush."""
+        generation = output.generation
+        if self.pcm is not None:
+            self.first_pcm_time = time.perf_counter()
+            output.write(self.pcm, generation)
+            return
+        pcm_stream = miniaudio.stream_any(
+            _ChunkSource(self.chunks), source_format=miniaudio.FileFormat.MP3,
+            nchannels=1, sample_rate=output.rate, frames_to_read=1024,
+        )
+        for samples in pcm_stream:
+            if self.first_pcm_time is None: self.first_pcm_time = time.perf_counter()
+            if not output.write(memoryview(samples).cast("B"), generation):
+                break
+
+
+class SynthesisPipeline:
+    """
+    Producer: ambil kalimat dari async iterator, langsung mulai sintesis streaming,
+    dan antre-kan SentenceAudio di queue terbatas (look-ahead). Consumer ambil
+    sesuai urutan, jadi kalimat N+1 sudah disintesis selagi kalimat N diputar.
+    """
+    def __init__(self, sentences, lookahead=TTS_LOOKAHEAD, should_stop=None, cache=None, connector=None):
+        self._sentences = sentences
+        self._cache = cache
+        self._connector = connector
+        self._should_stop = should_stop or (lambda: False)
+        # Producer memegang 1 kalimat saat queue penuh, jadi maxsize = lookahead - 1
+        self._pending = asyncio.Queue(maxsize=max(1, lookahead - 1))
+        self._producer = None
+
+    def start(self):
+        self._producer = asyncio.create_task(self._produce())
+        return self
+
+    async def _produce(self):
+        audio = None
+        cancelled = False
+        try:
+            async for sentence in self._sentences:
+                if self._should_stop(): break
+                audio = SentenceAudio(sentence, cache=self._cache, connector=self._connector).start()
+                await self._pending.put(audio)
+                audio = None
+        except asyncio.CancelledError:
+            cancelled = True
+            if audio: audio.cancel()
+            raise
+        except Exception as e:
+            print(f"{Fore.RED}[TTS ERROR] Sentence source failed: {e}{Style.RESET_ALL}")
+        finally:
+            # Sentinel selalu dikirim (juga kalau sumber kalimat error) supaya consumer tidak menunggu selamanya.
+            # Kalau di-cancel, consumer sendiri yang berhenti (cancel()), jadi tidak perlu.
+            if not cancelled:
+                await self._pending.put(None)
+
+    async def next(self):
+        """Return SentenceAudio berikutnya, atau None kalau habis."""
+        return await self._pending.get()
+
+    def cancel(self):
+        """Barge-in / selesai: hentikan producer dan semua sintesis yang masih antre."""
+        if self._producer and not self._producer.done():
+            self._producer.cancel()
+        while not self._pending.empty():
+            audio = self._pending.get_nowait()
+            if audio: audio.cancel()
+
+
+def report_tts_error(audio):
+    """Tampilkan error sintesis (kalau ada) setelah kalimat selesai diputar."""
+    if audio.task and audio.task.done() and not audio.task.cancelled() and audio.task.exception():
+        print(f"{Fore.RED}[TTS ERROR] {audio.task.exception()}{Style.RESET_ALL}")
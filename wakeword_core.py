@@ -0,0 +1,276 @@
+import os
+import glob
+import json
+import threading
+import time
+import numpy as np
+from colorama import Fore, Style
+
+from audio_core import SAMPLE_RATE
+
+TEMPLATE_DIR = "kevin_wakeword"
+CONFIG_FILE = "spotter.json"
+
+# --- MFCC CONFIG ---
+N_FFT = 512
+WIN = int(0.025 * SAMPLE_RATE)   # 25 ms
+HOP = int(0.010 * SAMPLE_RATE)   # 10 ms
+N_MELS = 26
+N_MFCC = 13
+SEARCH_SECONDS = 2.5             # Wake word diasumsikan ada di awal utterance
+MIN_THRESHOLD = 0.15             # Lantai threshold sebelum ada cukup sampel negatif
+POSITIVE_FLOOR_Q = 0.9           # Threshold tidak boleh turun di bawah kuantil ini dari skor positif (LOO + miss)
+VERIFY_INTERVAL = 60.0           # Fallback: paling sering 1 audio yang ditolak per interval ini dikirim ke STT
+NEAR_MISS_RATIO = 1.5            # Skor <= threshold * ratio dianggap hampir lolos
+STRONG_DYNAMIC_RANGE = 6.0       # p90/p10 RMS frame: utterance jelas (bukan noise) -> layak diverifikasi
+MAX_MISSES = 20
+
+
+def _mel_filterbank(n_mels=N_MELS, n_fft=N_FFT, rate=SAMPLE_RATE):
+    hz_to_mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    mel_to_hz = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+    mels = np.linspace(hz_to_mel(80.0), hz_to_mel(rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / rate).astype(int)
+    fbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fbank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fbank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fbank
+
+
+def _dct_matrix(n_out=N_MFCC, n_in=N_MELS):
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+
+_FBANK = _mel_filterbank()
+_DCT = _dct_matrix()
+_WINDOW = np.hamming(WIN).astype(np.float32)
+
+
+def mfcc(samples):
+    """MFCC (tanpa c0) + cepstral mean normalization. Return array [frames, N_MFCC-1]."""
+    x = samples.astype(np.float32) / 32768.0
+    if len(x) < WIN:
+        return np.zeros((0, N_MFCC - 1), dtype=np.float32)
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+    n_frames = 1 + (len(x) - WIN) // HOP
+    idx = np.arange(WIN)[None, :] + HOP * np.arange(n_frames)[:, None]
+    frames = x[idx] * _WINDOW
+    power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2 / N_FFT
+    log_mel = np.log(power @ _FBANK.T + 1e-10)
+    feats = (log_mel @ _DCT.T)[:, 1:]
+    return feats - feats.mean(axis=0, keepdims=True)
+
+
+def _trim_silence(samples, rel_db=-35.0):
+    """Potong hening di awal/akhir (berdasarkan energi relatif frame terkeras)."""
+    n_frames = len(samples) // HOP
+    if n_frames == 0:
+        return samples
+    frames = samples[:n_frames * HOP].reshape(n_frames, HOP).astype(np.float32)
+    energy = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-6)
+    voiced = np.nonzero(energy > energy.max() + rel_db)[0]
+    if len(voiced) == 0:
+        return samples
+    return samples[voiced[0] * HOP:(voiced[-1] + 1) * HOP]
+
+
+def _is_strong(samples):
+    """Utterance dengan dynamic range besar (suara jelas di atas background), bukan noise rata."""
+    n_frames = len(samples) // HOP
+    if n_frames < 10:
+        return False
+    frames = samples[:n_frames * HOP].reshape(n_frames, HOP).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1.0
+    p10, p90 = np.percentile(rms, [10, 90])
+    return p90 / p10 >= STRONG_DYNAMIC_RANGE
+
+
+def subsequence_dtw(template, query):
+    """
+    DTW subsequence: template harus match penuh, boleh mulai/berakhir di mana saja di query.
+    Step (1,0),(1,1),(1,2) -> tiap baris cuma tergantung baris sebelumnya, jadi vectorized per baris.
+    Return jarak ternormalisasi (per frame template).
+    """
+    if len(template) == 0 or len(query) == 0:
+        return np.inf
+    t = template / (np.linalg.norm(template, axis=1, keepdims=True) + 1e-8)
+    q = query / (np.linalg.norm(query, axis=1, keepdims=True) + 1e-8)
+    cost = 1.0 - t @ q.T   # cosine distance [M, N]
+    acc = cost[0].copy()
+    for i in range(1, len(t)):
+        prev = acc
+        shift1 = np.concatenate(([np.inf], prev[:-1]))
+        shift2 = np.concatenate(([np.inf, np.inf], prev[:-2]))
+        acc = cost[i] + np.minimum(np.minimum(prev, shift1), shift2)
+    return float(acc.min() / len(t))
+
+
+class WakeWordSpotter:
+    """
+    Keyword spotter lokal untuk "kevin": template matching MFCC + DTW.
+    Template di-enroll dari utterance yang isinya cuma wake word. Threshold
+    dikalibrasi dari sampel negatif supaya false-accept rate <= target_far.
+    """
+    def __init__(self, template_dir=TEMPLATE_DIR, target_far=0.02, min_templates=3, max_templates=8, max_negatives=60):
+        self.template_dir = template_dir
+        self.target_far = target_far
+        self.min_templates = min_templates
+        self.max_templates = max_templates
+        self.max_negatives = max_negatives
+        self.templates = []
+        self.negatives = []
+        self.misses = []          # Skor wake word asli yang sempat ditolak (ketahuan lewat verifikasi STT)
+        self.threshold = None
+        self.last_score = None
+        self.last_verify = False  # True kalau detect() terakhir meloloskan audio cuma untuk verifikasi
+        self._last_verify_time = 0.0
+        self._lock = threading.Lock()  # templates/negatives diubah dari executor, dibaca thread capture
+        os.makedirs(template_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def ready(self):
+        return len(self.templates) >= self.min_templates and self.threshold is not None
+
+    @property
+    def wants_templates(self):
+        return len(self.templates) < self.max_templates
+
+    def _load(self):
+        for path in sorted(glob.glob(os.path.join(self.template_dir, "tpl_*.npy"))):
+            self.templates.append(np.load(path))
+        for path in sorted(glob.glob(os.path.join(self.template_dir, "neg_*.npy")))[-self.max_negatives:]:
+            self.negatives.append(np.load(path))
+        cfg = self._read_config()
+        if cfg is not None:
+            self.threshold = cfg.get("threshold")
+            self.target_far = cfg.get("target_far", self.target_far)
+            self.misses = cfg.get("misses", [])
+        elif self.templates:
+            self.calibrate()
+
+    def _read_config(self):
+        """Isi spotter.json, atau None kalau tidak ada / rusak (-> default + kalibrasi ulang)."""
+        cfg_path = os.path.join(self.template_dir, CONFIG_FILE)
+        if not os.path.exists(cfg_path):
+            return None
+        try:
+            with open(cfg_path) as f:
+                cfg = json.load(f)
+            if not isinstance(cfg, dict):
+                raise ValueError("not a JSON object")
+            return cfg
+        except (OSError, ValueError) as e:
+            print(f"{Fore.YELLOW}[WAKEWORD] {CONFIG_FILE} unreadable ({e}), using defaults{Style.RESET_ALL}")
+            return None
+
+    def _save_config(self):
+        # Dipanggil dari beberapa executor sekaligus: tulis file temp lalu os.replace di bawah lock
+        cfg_path = os.path.join(self.template_dir, CONFIG_FILE)
+        with self._lock:
+            cfg = {"threshold": self.threshold, "target_far": self.target_far, "misses": list(self.misses),
+                   "templates": len(self.templates), "negatives": len(self.negatives)}
+            with open(cfg_path + ".tmp", "w") as f:
+                json.dump(cfg, f)
+            os.replace(cfg_path + ".tmp", cfg_path)
+
+    def score(self, samples):
+        """Jarak DTW terkecil ke semua template (makin kecil makin mirip)."""
+        with self._lock:
+            templates = list(self.templates)
+        if not templates:
+            return np.inf
+        query = mfcc(samples[:int(SEARCH_SECONDS * SAMPLE_RATE)])
+        return min(subsequence_dtw(tpl, query) for tpl in templates)
+
+    def detect(self, samples):
+        """
+        True kalau wake word terdeteksi. Audio yang ditolak tapi hampir lolos / jelas suara
+        sesekali tetap diloloskan (last_verify=True) supaya STT bisa mengoreksi threshold
+        lewat add_miss(); tanpa ini spotter tidak pernah dapat umpan balik lagi.
+        """
+        self.last_verify = False
+        self.last_score = None
+        if not self.ready:
+            return True  # Belum siap: jangan blokir, biar STT yang memutuskan
+        self.last_score = self.score(samples)
+        if self.last_score <= self.threshold:
+            return True
+        now = time.monotonic()
+        if now - self._last_verify_time < VERIFY_INTERVAL:
+            return False
+        if self.last_score <= self.threshold * NEAR_MISS_RATIO or _is_strong(samples):
+            self._last_verify_time = now
+            self.last_verify = True
+            return True
+        return False
+
+    def add_miss(self, score):
+        """Wake word asli yang ditolak (STT bilang ada "kevin"): threshold minimal harus meloloskan skor ini."""
+        if score is None or not np.isfinite(score):
+            return
+        with self._lock:
+            self.misses = (self.misses + [float(score)])[-MAX_MISSES:]
+        print(f"{Fore.MAGENTA}[WAKEWORD] Missed wake word (score {score:.3f} > {self.threshold:.3f}), recalibrating{Style.RESET_ALL}")
+        self.calibrate()
+
+    def enroll(self, samples):
+        """Tambah template dari audio yang isinya cuma "kevin"."""
+        if not self.wants_templates:
+            return
+        feats = mfcc(_trim_silence(samples))
+        if len(feats) < 10:
+            return
+        with self._lock:
+            self.templates.append(feats)
+        np.save(os.path.join(self.template_dir, f"tpl_{int(time.time() * 1000)}.npy"), feats)
+        print(f"{Fore.MAGENTA}[WAKEWORD] Template enrolled ({len(self.templates)}/{self.max_templates}){Style.RESET_ALL}")
+        self.calibrate()
+
+    def add_negative(self, samples):
+        """Simpan utterance tanpa wake word (hasil STT) sebagai sampel negatif untuk kalibrasi."""
+        feats = mfcc(samples[:int(SEARCH_SECONDS * SAMPLE_RATE)])
+        if len(feats) < 10:
+            return
+        with self._lock:
+            self.negatives.append(feats)
+            overflow = len(self.negatives) > self.max_negatives
+            if overflow: self.negatives.pop(0)
+        np.save(os.path.join(self.template_dir, f"neg_{int(time.time() * 1000)}.npy"), feats)
+        if overflow:
+            oldest = sorted(glob.glob(os.path.join(self.template_dir, "neg_*.npy")))
+            for path in oldest[:-self.max_negatives]:
+                os.remove(path)
+        self.calibrate()
+
+    def calibrate(self, target_far=None):
+        """
+        Set threshold. Dengan cukup negatif: kuantil target_far dari skor negatif
+        (jadi paling banyak target_far negatif yang lolos). Tanpa negatif: dari
+        leave-one-out skor antar template, dengan margin. Threshold tidak pernah turun di
+        bawah kuantil POSITIVE_FLOOR_Q skor positif (template LOO + miss yang terverifikasi).
+        """
+        if target_far is not None:
+            self.target_far = target_far
+        with self._lock:
+            templates, negatives, misses = list(self.templates), list(self.negatives), list(self.misses)
+        if len(templates) < self.min_templates:
+            self.threshold = None
+            return None
+        positives = [min(subsequence_dtw(t, q) for j, t in enumerate(templates) if j != i)
+                     for i, q in enumerate(templates)] + misses
+        loose = max(MIN_THRESHOLD, float(np.max(positives)) * 1.5)
+        if len(negatives) >= 20:
+            neg_scores = np.array([min(subsequence_dtw(t, q) for t in templates) for q in negatives])
+            floor = float(np.quantile(positives, POSITIVE_FLOOR_Q))
+            self.threshold = max(floor, min(loose, float(np.quantile(neg_scores, self.target_far))))
+        else:
+            self.threshold = loose
+        self._save_config()
+        return self.threshold